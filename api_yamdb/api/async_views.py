@@ -0,0 +1,49 @@
+"""Async entry points of the read-heavy endpoints for the ASGI mode.
+
+Django 3.2 has no async ORM and DRF views are synchronous. Under ASGI
+Django runs every sync view in one shared thread, so a slow query holds
+up all other requests of the worker. Here the whole DRF view, with its
+authentication, permissions, caching and serialization unchanged, runs
+in the thread pool of the event loop instead, and the worker serves as
+many requests at once as the pool has threads.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from api_yamdb.db.health import check_connections
+
+
+def run_in_pool(view):
+    """Async view running the sync view in the thread pool."""
+
+    def run(request, *args, **kwargs):
+        # pool threads keep their own connections, check and close them
+        # the way request_started and request_finished do for sync views
+        check_connections()
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await sync_to_async(run, thread_sensitive=False)(
+            request, *args, **kwargs
+        )
+
+    return async_view
+
+
+class AsyncViewMixin:
+    """Routes the viewset through run_in_pool when ASYNC_VIEWS is on,
+    asgi.py turns it on for the ASGI mode."""
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if settings.ASYNC_VIEWS:
+            return run_in_pool(view)
+        return view
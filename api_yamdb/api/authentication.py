@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+from reviews.models import User
+
+TOKEN_USER_CLAIMS = ('username', 'role', 'is_superuser')
+
+
+def get_auth_cache():
+    """Cache of the revocation markers. It must not lose them: a missing
+    marker makes a revoked token trusted again until it expires."""
+    return caches[settings.AUTH_CACHE_ALIAS]
+
+
+def changed_key(user_id):
+    return f'auth:changed:{user_id}'
+
+
+def mark_user_changed(user_id, changed_at):
+    """Tokens issued before changed_at stop being trusted on their own
+    claims and go through the database lookup until they expire."""
+    get_auth_cache().set(
+        changed_key(user_id),
+        changed_at,
+        api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    )
+
+
+class RoleAccessToken(AccessToken):
+    """Access token that also carries the fields
+    the permission classes read from request.user."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['iat'] = datetime_to_epoch(token.current_time)
+        for claim in TOKEN_USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Builds request.user from the token claims instead of the User row.
+    The user is a regular User instance with every other field deferred,
+    so a view touching e.g. email still loads it on demand.
+    Tokens without the claims, or issued before the user was changed,
+    fall back to the usual database lookup."""
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_USER_CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        changed_at = get_auth_cache().get(changed_key(user_id))
+        if (changed_at is not None
+                and changed_at >= validated_token.get('iat', 0)):
+            return super().get_user(validated_token)
+        loaded = {
+            'id': user_id,
+            'is_active': True,
+            **{claim: validated_token[claim] for claim in TOKEN_USER_CLAIMS}
+        }
+        fields = [field.attname for field in User._meta.concrete_fields
+                  if field.attname in loaded]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, fields, [loaded[field] for field in fields]
+        )
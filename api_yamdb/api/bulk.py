@@ -0,0 +1,227 @@
+"""Bulk upsert of catalog objects from a JSON array or NDJSON.
+
+Every item is validated on its own and a bad item is reported with its
+index instead of failing the batch. Related slugs are resolved with one
+query per relation and the valid items are written with bulk queries
+in one transaction.
+"""
+import json
+from abc import ABC, abstractmethod
+
+from api.cache import invalidate
+from api.permissions import IsAdmin
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.response import Response
+from reviews.models import Category, Genre, Title
+from reviews.signals import recount_titles, touch_titles
+
+
+class NDJSONParser(BaseParser):
+    """One JSON object per line."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            return [
+                json.loads(line)
+                for line in stream.read().decode(encoding).splitlines()
+                if line.strip()
+            ]
+        except ValueError as error:
+            raise ParseError(f'NDJSON parse error - {error}')
+
+
+class BulkUpsertMixin(ABC):
+    """Adds POST <list url>/bulk/ for administrators.
+    The response lists the keys of created and updated objects
+    and the errors of rejected items by their index."""
+    bulk_serializer_class = None
+    bulk_invalidates = ()
+
+    @action(
+        methods=('post',),
+        detail=False,
+        permission_classes=(IsAdmin,),
+        parser_classes=(JSONParser, NDJSONParser)
+    )
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Expected a list of items')
+        if len(items) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'At most {settings.BULK_MAX_ITEMS} items are allowed'
+            )
+        context = self.get_serializer_context()
+        context['related'] = self.get_bulk_related(items)
+        valid, errors = [], []
+        for index, item in enumerate(items):
+            serializer = self.bulk_serializer_class(data=item,
+                                                    context=context)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        with transaction.atomic():
+            created, updated = self.bulk_write(valid, errors)
+        if created or updated:
+            invalidate(*self.bulk_invalidates)
+        errors.sort(key=lambda error: error['index'])
+        return Response(
+            {'created': created, 'updated': updated, 'errors': errors}
+        )
+
+    def get_bulk_related(self, items):
+        """Related objects by model and slug for the whole batch."""
+        return {}
+
+    @abstractmethod
+    def bulk_write(self, items, errors):
+        """Writes the validated items, returns created and updated keys.
+        Items rejected at this step are appended to errors."""
+
+
+class SlugBulkUpsertMixin(BulkUpsertMixin):
+    """Upsert by slug for categories and genres."""
+
+    def bulk_write(self, items, errors):
+        model = self.get_queryset().model
+        slugs = {data['slug'] for _, data in items}
+        names = {data['name'] for _, data in items}
+        existing = {}
+        name_owners = {}
+        now = timezone.now()
+        for instance in model.objects.filter(
+                Q(slug__in=slugs) | Q(name__in=names)):
+            existing[instance.slug] = instance
+            name_owners[instance.name] = instance.slug
+        created, updated = [], []
+        seen = set()
+        for index, data in items:
+            slug, name = data['slug'], data['name']
+            if slug in seen:
+                errors.append({'index': index, 'errors': {
+                    'slug': ['Duplicate slug in the batch']}})
+                continue
+            if name_owners.get(name, slug) != slug:
+                errors.append({'index': index, 'errors': {
+                    'name': ['This name is already taken']}})
+                continue
+            seen.add(slug)
+            name_owners[name] = slug
+            instance = existing.get(slug)
+            if instance is None:
+                created.append(model(slug=slug, name=name))
+            elif instance.name != name:
+                instance.name = name
+                instance.updated_at = now
+                updated.append(instance)
+        model.objects.bulk_create(created)
+        model.objects.bulk_update(updated, ('name', 'updated_at'))
+        # titles show the names of their genres and category
+        touch_titles(Title.objects.filter(
+            **{f'{model._meta.model_name}__in': updated}
+        ).values_list('pk', flat=True))
+        return (
+            [instance.slug for instance in created],
+            [instance.slug for instance in updated]
+        )
+
+
+class TitleBulkUpsertMixin(BulkUpsertMixin):
+    """Upsert by id for titles, items without an id are created."""
+    bulk_invalidates = ('titles', 'genres', 'categories')
+
+    def get_bulk_related(self, items):
+        genres, categories = set(), set()
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('genre'), list):
+                genres.update(
+                    slug for slug in item['genre'] if isinstance(slug, str)
+                )
+            if isinstance(item.get('category'), str):
+                categories.add(item['category'])
+        return {
+            Genre: Genre.objects.in_bulk(list(genres), field_name='slug'),
+            Category: Category.objects.in_bulk(list(categories),
+                                               field_name='slug'),
+        }
+
+    def create_titles(self, titles):
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+            return
+        # the ids are needed for the genre rows, raw saves skip
+        # the per title counting, titles are counted after the batch
+        for title in titles:
+            title.save_base(raw=True)
+
+    def bulk_write(self, items, errors):
+        existing = Title.objects.in_bulk(
+            [data['id'] for _, data in items if 'id' in data]
+        )
+        created, updated = [], []
+        genres = []
+        categories = set()
+        seen = set()
+        # bulk_update and raw saves leave auto_now fields alone
+        now = timezone.now()
+        for index, data in items:
+            data = dict(data)
+            title_genres = data.pop('genre')
+            if data.get('id') in seen:
+                errors.append({'index': index, 'errors': {
+                    'id': ['Duplicate id in the batch']}})
+                continue
+            if 'id' not in data:
+                title = Title(**data)
+                created.append(title)
+            elif data['id'] in existing:
+                seen.add(data['id'])
+                title = existing[data['id']]
+                categories.add(title.category_id)
+                for field, value in data.items():
+                    setattr(title, field, value)
+                # new titles have no reviews, only these can be on boards
+                title.leaderboard_pending = True
+                updated.append(title)
+            else:
+                errors.append({'index': index, 'errors': {
+                    'id': ['Title not found']}})
+                continue
+            categories.add(title.category_id)
+            title.updated_at = now
+            genres.append((title, set(title_genres)))
+        self.create_titles(created)
+        Title.objects.bulk_update(
+            updated, ('name', 'year', 'description', 'category', 'updated_at',
+                      'leaderboard_pending')
+        )
+        through = Title.genre.through
+        old_rows = through.objects.filter(title__in=updated)
+        genre_ids = set(old_rows.values_list('genre_id', flat=True))
+        old_rows.delete()
+        through.objects.bulk_create(
+            through(title_id=title.pk, genre_id=genre.pk)
+            for title, title_genres in genres
+            for genre in title_genres
+        )
+        # bulk writes send no signals, count the touched ones again
+        recount_titles(Category, categories)
+        recount_titles(Genre, genre_ids.union(
+            genre.pk for _, title_genres in genres for genre in title_genres
+        ))
+        return (
+            [title.pk for title in created],
+            [title.pk for title in updated]
+        )
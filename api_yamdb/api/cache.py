@@ -0,0 +1,147 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def version_key(scope):
+    return f'api:version:{scope}'
+
+
+def get_version(scope):
+    """Current generation of a cache scope.
+    Entries are never deleted one by one, bumping the generation
+    makes every key of the scope unreachable at once."""
+    cache = get_cache()
+    version = cache.get(version_key(scope))
+    if version is not None:
+        return version
+    cache.add(version_key(scope), time.time_ns(), None)
+    return cache.get(version_key(scope))
+
+
+def invalidate(*scopes):
+    cache = get_cache()
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(version_key(scope), time.time_ns(), None)
+
+
+def invalidate_on_commit(*scopes):
+    """Invalidates the scopes once the write commits. A request that
+    reads the old rows meanwhile caches them under the old generation,
+    invalidating before the commit would let it cache them under the
+    new one."""
+    transaction.on_commit(lambda: invalidate(*scopes))
+
+
+def latest(queryset, field='updated_at'):
+    """Subquery of the latest stamp of the rows, one index lookup
+    with an index ending in the field."""
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1])
+
+
+class CachedResponseMixin:
+    """Caches list and retrieve responses of anonymous users.
+    Keys are built from the scope generation and the full path
+    with the query string, so pages and filters are cached separately.
+
+    Every response carries the validators of get_validators: an ETag
+    of the version stamps and a Last-Modified, or for views without
+    them an ETag of the cache key. Anonymous responses keep their
+    stamps next to the data, so a cached response is revalidated
+    without a query; authenticated requests are not cached and read
+    the stamps before the queryset. If-None-Match and If-Modified-Since
+    are answered by Django's conditional GET, with the weak comparison
+    of ETags."""
+    cache_scope = None
+
+    def get_cache_scope(self):
+        return self.cache_scope
+
+    def get_validators(self):
+        """(stamps, last_modified) of the response of the action,
+        read without building it, or None to skip the check.
+        last_modified is None where deletions do not move it."""
+
+    def get_etag(self, request, stamps, last_modified):
+        """ETag and Last-Modified timestamp of the validators."""
+        digest = hashlib.md5(repr((
+            request.get_full_path(), request.accepted_media_type, stamps
+        )).encode()).hexdigest()
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return quote_etag(digest), last_modified
+
+    def validated_response(self, build, request, validators):
+        """The response of build() with the validators, or 304 when
+        the request already has it."""
+        etag, last_modified = self.get_etag(request, *validators)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = build()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        # stamps are read first, a write in between makes the next
+        # request fetch the body again rather than miss the write
+        return self.validated_response(
+            lambda: handler(request, *args, **kwargs), request, validators
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return self.conditional_response(
+                handler, request, *args, **kwargs
+            )
+        digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f'api:response:{self.get_cache_scope()}:{digest}'
+        key = f'{key}:{get_version(self.get_cache_scope())}'
+        cache = get_cache()
+        entry = cache.get(key)
+        if entry is not None:
+            data, validators = entry
+            return self.validated_response(
+                lambda: Response(data), request, validators
+            )
+        validators = self.get_validators() or ((key,), None)
+
+        def build():
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, (response.data, validators),
+                          settings.API_CACHE_TIMEOUT)
+            return response
+
+        return self.validated_response(build, request, validators)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,197 @@
+"""Change feed of the catalog for clients that keep a copy of it.
+
+Categories, genres, titles and reviews are read in the order of their
+updated_at and id, deletions from the tombstones. The position of a
+client is an opaque token of the last (time, feed, id) it has seen, so
+a page costs one index range scan per feed, whatever the catalog size.
+
+A transaction that has not committed yet may still write rows stamped
+after its start, so the feed stops CHANGES_SETTLE_SECONDS before now
+and, on PostgreSQL, before the start of the oldest open transaction:
+a load_data file or a bulk upsert that runs for minutes holds the feed
+back until it commits. The window itself covers the time between a
+stamp and the start of its transaction and the lag of the replica.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import timedelta
+from operator import itemgetter
+
+from api.serializers import (CategorySerializer, GenreSerializer,
+                             ReviewSearchSerializer, TitleSerializerReadOnly)
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from reviews.models import Category, Genre, Review, Title, Tombstone
+
+Feed = namedtuple('Feed', 'name queryset serializer key')
+Position = namedtuple('Position', 'time rank pk')
+
+FEEDS = (
+    Feed('category', Category.objects.all(), CategorySerializer, 'slug'),
+    Feed('genre', Genre.objects.all(), GenreSerializer, 'slug'),
+    Feed(
+        'title',
+        Title.objects.select_related('category').prefetch_related('genre'),
+        TitleSerializerReadOnly,
+        'id'
+    ),
+    Feed(
+        'review', Review.objects.select_related('author'),
+        ReviewSearchSerializer, 'id'
+    ),
+)
+KEYS = {feed.name: feed.key for feed in FEEDS}
+# rank of the tombstones, read after the feeds of the same time
+TOMBSTONES = len(FEEDS)
+# rank after every feed, a position with it has seen the whole time
+END = TOMBSTONES + 1
+OLDEST_TRANSACTION_SQL = (
+    'SELECT min(xact_start) FROM pg_stat_activity '
+    "WHERE datname = current_database() AND backend_type = 'client backend' "
+    'AND pid <> pg_backend_pid()'
+)
+
+
+class ExpiredTokenError(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = ('The token is older than the kept deletions, '
+                      'sync from the beginning.')
+    default_code = 'expired_token'
+
+
+def encode_token(position):
+    raw = json.dumps(
+        [position.time.isoformat(), position.rank, position.pk]
+    ).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_token(token):
+    """Position of a token, ValueError for anything encode_token
+    did not make."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        time, rank, pk = json.loads(raw)
+        time = parse_datetime(time)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid token')
+    if (time is None or timezone.is_naive(time)
+            or not isinstance(rank, int) or not isinstance(pk, int)
+            or not 0 <= rank <= END):
+        raise ValueError('Invalid token')
+    return Position(time, rank, pk)
+
+
+def after(position, rank, field):
+    """Rows of the feed of rank that come after position, in the
+    (time, rank, id) order."""
+    if position is None:
+        return Q()
+    if rank > position.rank:
+        return Q(**{f'{field}__gte': position.time})
+    if rank < position.rank:
+        return Q(**{f'{field}__gt': position.time})
+    return (
+        Q(**{f'{field}__gt': position.time})
+        | Q(**{field: position.time, 'pk__gt': position.pk})
+    )
+
+
+def oldest_transaction():
+    """Start of the oldest transaction open on the default DataBase,
+    None when there is none or the backend does not report it."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(OLDEST_TRANSACTION_SQL)
+        return cursor.fetchone()[0]
+
+
+def settled_time(now):
+    """Time up to which every write has committed."""
+    started = oldest_transaction()
+    if started is not None:
+        now = min(now, started)
+    return now - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+
+
+def read_changes(position, limit, until):
+    """Up to limit (position, type, object) changes after position
+    and not after until, and whether there are more of them."""
+    changes = []
+    for rank, feed in enumerate(FEEDS):
+        rows = feed.queryset.filter(
+            after(position, rank, 'updated_at'), updated_at__lte=until
+        ).order_by('updated_at', 'pk')[:limit + 1]
+        changes += [
+            (Position(row.updated_at, rank, row.pk), feed.name, row)
+            for row in rows
+        ]
+    tombstones = Tombstone.objects.filter(
+        after(position, TOMBSTONES, 'deleted_at'), deleted_at__lte=until
+    ).order_by('deleted_at', 'pk')[:limit + 1]
+    changes += [
+        (Position(row.deleted_at, TOMBSTONES, row.pk), row.model, row)
+        for row in tombstones
+    ]
+    changes.sort(key=itemgetter(0))
+    return changes[:limit], len(changes) > limit
+
+
+def feed_items(changes, context):
+    """Feed items of the changes, the objects of a feed are
+    serialized together."""
+    live = {}
+    for feed in FEEDS:
+        objects = [
+            row for position, name, row in changes
+            if name == feed.name and position.rank != TOMBSTONES
+        ]
+        data = feed.serializer(objects, many=True, context=context).data
+        live.update(((feed.name, row.pk), item)
+                    for row, item in zip(objects, data))
+    items = []
+    for position, name, row in changes:
+        if position.rank != TOMBSTONES:
+            items.append(
+                {'type': name, 'deleted': False, 'data': live[name, row.pk]}
+            )
+            continue
+        key = KEYS[name]
+        items.append({'type': name, 'deleted': True, 'data': {
+            key: int(row.key) if key == 'id' else row.key
+        }})
+    return items
+
+
+def read_page(token, context):
+    """A page of the feed after the token, None starts from the
+    beginning. The next token of the last page is the settled time,
+    a client polling an idle catalog does not read anything."""
+    now = timezone.now()
+    position = None if token is None else decode_token(token)
+    retention = timedelta(days=settings.CHANGES_RETENTION_DAYS)
+    if position is not None and position.time < now - retention:
+        raise ExpiredTokenError()
+    until = settled_time(now)
+    changes, has_more = read_changes(
+        position, settings.CHANGES_PAGE_SIZE, until
+    )
+    if has_more:
+        next_position = changes[-1][0]
+    else:
+        next_position = max(
+            filter(None, (position, Position(until, END, 0)))
+        )
+    return {
+        'results': feed_items(changes, context),
+        'next': encode_token(next_position),
+        'has_more': has_more,
+    }
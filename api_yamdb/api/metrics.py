@@ -0,0 +1,137 @@
+"""Per-request timings and per-endpoint histograms.
+
+The registry lives in the worker process: every gunicorn worker keeps
+its own histograms, the same way the other local-memory state does.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """Timings of a single request, filled while it is processed."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+
+def count_query(execute, sql, params, many, context):
+    """Database execute wrapper installed on every connection, counts
+    the query into the metrics of the current request. The metrics are
+    found through the context, so queries of views run in the thread
+    pool under ASGI are counted as well."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+class EndpointHistogram:
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def observe(self, duration, metrics):
+        self.buckets[bisect_left(BUCKETS, duration)] += 1
+        self.count += 1
+        self.duration += duration
+        self.queries += metrics.queries
+        self.db_time += metrics.db_time
+        self.serializer_time += metrics.serializer_time
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, endpoint, duration, metrics):
+        with self.lock:
+            histogram = self.endpoints.get(endpoint)
+            if histogram is None:
+                histogram = self.endpoints[endpoint] = EndpointHistogram()
+            histogram.observe(duration, metrics)
+
+    def prometheus(self):
+        """Renders the histograms in the Prometheus text format."""
+        lines = [
+            '# TYPE api_request_duration_seconds histogram',
+        ]
+        totals = {
+            'api_request_db_queries_total': 'queries',
+            'api_request_db_seconds_total': 'db_time',
+            'api_request_serializer_seconds_total': 'serializer_time',
+        }
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for (view, method), histogram in endpoints:
+                labels = f'view="{view}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',),
+                                        histogram.buckets):
+                    cumulative += count
+                    lines.append(
+                        'api_request_duration_seconds_bucket'
+                        f'{{{labels},le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'api_request_duration_seconds_sum{{{labels}}} '
+                             f'{histogram.duration}')
+                lines.append('api_request_duration_seconds_count'
+                             f'{{{labels}}} {histogram.count}')
+            for name, attribute in totals.items():
+                lines.append(f'# TYPE {name} counter')
+                lines.extend(
+                    f'{name}{{view="{view}",method="{method}"}} '
+                    f'{getattr(histogram, attribute)}'
+                    for (view, method), histogram in endpoints
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+TIMED_SERIALIZERS = {}
+
+
+def timed_serializer(serializer_class):
+    """Serializer subclass adding its to_representation time
+    to the metrics of the current request."""
+    if serializer_class in TIMED_SERIALIZERS:
+        return TIMED_SERIALIZERS[serializer_class]
+
+    class TimedSerializer(serializer_class):
+
+        def to_representation(self, instance):
+            metrics = current_metrics.get()
+            if metrics is None:
+                return super().to_representation(instance)
+            started = time.perf_counter()
+            try:
+                return super().to_representation(instance)
+            finally:
+                metrics.serializer_time += time.perf_counter() - started
+
+    TimedSerializer.__name__ = serializer_class.__name__
+    TimedSerializer.__qualname__ = serializer_class.__qualname__
+    TIMED_SERIALIZERS[serializer_class] = TimedSerializer
+    return TimedSerializer
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import time
+
+from api.metrics import RequestMetrics, current_metrics, registry
+
+from api_yamdb.db.routers import read_from_replica
+
+logger = logging.getLogger('api.metrics')
+
+
+class MetricsMiddleware:
+    """Measures every request: total time, number and time of
+    DB queries and serializer time. Adds a Server-Timing header,
+    logs one JSON line per request and feeds the endpoint histograms
+    served by /api/v1/_metrics. Works in both WSGI and ASGI chains."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # marks the instance as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.record(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.record(request, response, metrics)
+
+    def record(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        view, method = self.endpoint(request)
+        registry.observe((view, method), duration, metrics)
+        response['Server-Timing'] = (
+            f'db;dur={metrics.db_time * 1000:.1f};'
+            f'desc="{metrics.queries} queries", '
+            f'serialize;dur={metrics.serializer_time * 1000:.1f}, '
+            f'total;dur={duration * 1000:.1f}'
+        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': view,
+                'method': method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'serializer_ms': round(metrics.serializer_time * 1000, 2),
+            }))
+        return response
+
+    def endpoint(self, request):
+        """Router url name and action (e.g. title-list, list),
+        so every object id shares the histogram of its endpoint."""
+        match = request.resolver_match
+        if match is None:
+            return 'unresolved', request.method
+        actions = getattr(match.func, 'actions', None) or {}
+        action = actions.get(request.method.lower(), request.method)
+        return match.view_name or match.url_name, action
+
+
+class ReplicaMiddleware:
+    """Lets ReplicaRouter send the queries of GET, HEAD and OPTIONS
+    requests to the read replica."""
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = read_from_replica.set(request.method in self.safe_methods)
+        try:
+            return self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+
+    async def __acall__(self, request):
+        token = read_from_replica.set(request.method in self.safe_methods)
+        try:
+            return await self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
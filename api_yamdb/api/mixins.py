@@ -1,3 +1,4 @@
+from api.metrics import timed_serializer
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
 
@@ -8,3 +9,66 @@ class CreateDestroyListMixin(
     ListModelMixin
 ):
     pass
+
+
+class TimedSerializerMixin:
+    """Counts the serializer time of the view into the request metrics."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = timed_serializer(self.get_serializer_class())
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class SparseFieldsMixin:
+    """?fields=id,name limits list and retrieve responses to the listed
+    fields, ?expand= adds the optional ones, expandable_fields of the
+    serializer Meta. The queryset of sparse_queryset() then loads only
+    the columns and relations the fields of the response read:
+    field_columns maps a field to its columns, by default the field
+    name, field_select_related and field_prefetch_related map a field
+    to the relations to join or prefetch for it. required_columns are
+    loaded whatever the fields, e.g. the key of the parent object a
+    related manager sets on every object."""
+    fields_param = 'fields'
+    expand_param = 'expand'
+    sparse_actions = ('list', 'retrieve')
+    required_columns = ()
+    field_columns = {}
+    field_select_related = {}
+    field_prefetch_related = {}
+
+    def get_query_names(self, param):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        return set(filter(None, value.split(',')))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.sparse_actions:
+            context['fields'] = self.get_query_names(self.fields_param)
+            context['expand'] = self.get_query_names(self.expand_param)
+        return context
+
+    def get_ordering_columns(self):
+        # cursor pages read the position from the last object
+        pagination = getattr(self.paginator, 'cursor_pagination_class', None)
+        ordering = getattr(pagination, 'ordering', ())
+        return [field.lstrip('-') for field in ordering]
+
+    def sparse_queryset(self, queryset):
+        columns = {
+            queryset.model._meta.pk.name, *self.required_columns,
+            *self.get_ordering_columns()
+        }
+        select_related, prefetch_related = [], []
+        for name in self.get_serializer().fields:
+            columns.update(self.field_columns.get(name, (name,)))
+            select_related.extend(self.field_select_related.get(name, ()))
+            prefetch_related.extend(self.field_prefetch_related.get(name, ()))
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset.only(*columns)
@@ -0,0 +1,68 @@
+from api.filters import FullTextSearchFilter, TitleOrdering
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TitleCursorPagination(CursorPagination):
+    ordering = ('name', 'id')
+
+
+class PubDateCursorPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class CursorOptInPagination(PageNumberPagination):
+    """Page number pagination by default.
+    Clients that send ?pagination=cursor (or follow a cursor link)
+    get keyset pagination instead: no COUNT(*) and no OFFSET,
+    so every page costs the same however deep it is.
+    The cursor follows the fixed order of cursor_pagination_class,
+    so the parameters of unordered_params that reorder the results
+    are rejected with it."""
+    cursor_pagination_class = None
+    unordered_params = ()
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def check_cursor_params(self, request):
+        errors = {
+            param: ['Not supported with cursor pagination.']
+            for param in self.unordered_params
+            if param in request.query_params
+        }
+        if errors:
+            raise ValidationError(errors)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.check_cursor_params(request)
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitlePagination(CursorOptInPagination):
+    cursor_pagination_class = TitleCursorPagination
+    unordered_params = (
+        TitleOrdering.ordering_param, FullTextSearchFilter.search_param
+    )
+
+
+class PubDatePagination(CursorOptInPagination):
+    cursor_pagination_class = PubDateCursorPagination
@@ -0,0 +1,70 @@
+"""Rating statistics derived from the stored title aggregates.
+
+Every value is computed from reviews_count, score_sum and the score
+histogram of the title, no review is read.
+"""
+from api.cache import get_cache
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Sum, When
+from django.db.models.functions import Cast
+from reviews.models import SCORES, Title
+
+MEAN_KEY = 'api:ratings:mean'
+
+
+def rating_mean():
+    """Mean score of all reviews, the prior of the weighted rating.
+    It moves slowly, so it is cached for RATING_MEAN_TIMEOUT seconds."""
+    cache = get_cache()
+    mean = cache.get(MEAN_KEY)
+    if mean is not None:
+        return mean
+    totals = Title.objects.aggregate(
+        count=Sum('reviews_count'), total=Sum('score_sum')
+    )
+    if totals['count']:
+        mean = totals['total'] / totals['count']
+    else:
+        mean = (SCORES[0] + SCORES[-1]) / 2
+    cache.set(MEAN_KEY, mean, settings.RATING_MEAN_TIMEOUT)
+    return mean
+
+
+def weighted_rating(title, mean):
+    """Bayesian average: the rating pulled towards the mean of all
+    reviews by RATING_PRIOR_WEIGHT imaginary reviews, so a title
+    with a few high scores does not outrank a well reviewed one."""
+    if not title.reviews_count:
+        return None
+    weight = settings.RATING_PRIOR_WEIGHT
+    return (title.score_sum + weight * mean) / (title.reviews_count + weight)
+
+
+def weighted_rating_expression(mean):
+    """weighted_rating() as an SQL expression, for sorting."""
+    weight = settings.RATING_PRIOR_WEIGHT
+    return Case(
+        When(reviews_count=0, then=None),
+        default=(
+            (Cast('score_sum', FloatField()) + weight * mean)
+            / (F('reviews_count') + weight)
+        ),
+        output_field=FloatField()
+    )
+
+
+def median_score(histogram):
+    """Median score, walks the histogram from the lowest score."""
+    count = sum(histogram)
+    if not count:
+        return None
+    lower = upper = None
+    seen = 0
+    for score, bucket in zip(SCORES, histogram):
+        seen += bucket
+        if lower is None and seen >= (count + 1) // 2:
+            lower = score
+        if seen >= count // 2 + 1:
+            upper = score
+            break
+    return (lower + upper) / 2
@@ -0,0 +1,37 @@
+"""JSON rendering with orjson when it is installed.
+
+orjson serializes the ReturnDict and ReturnList structures of DRF and
+the error details natively, several times faster than the json module
+of the standard library. Values it has no type for, datetimes included
+so their format stays DRF's, go to the encoder of DRF. Without orjson,
+and for indented, ASCII only or non-strict output, DRF's JSONRenderer
+is used.
+
+orjson writes NaN and Infinity as null, where the strict JSON of DRF
+raises. The API computes no such value, checking every float would
+cost what orjson saves.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer rendering with orjson."""
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or self.ensure_ascii or not self.strict
+                or self.get_indent(accepted_media_type or '',
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=self.default, option=OPTIONS)
@@ -1,6 +1,27 @@
+from api import ratings
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (SCORES, Category, Comment, Genre, LeaderboardEntry,
+                            Review, Title, User)
+
+
+class SparseFieldsSerializerMixin:
+    """Drops the fields missing from the fields of the context and the
+    expandable_fields of the Meta missing from its expand,
+    see SparseFieldsMixin of the views."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand') or ()
+        for name in getattr(self.Meta, 'expandable_fields', ()):
+            if name not in expand:
+                fields.pop(name)
+        requested = self.context.get('fields')
+        if requested is not None:
+            for name in list(fields):
+                if name not in requested:
+                    fields.pop(name)
+        return fields
 
 
 class SignUpSerializer(serializers.Serializer):
@@ -65,20 +86,36 @@ class ProfileSerializer(UserSerializer):
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer created for Category
-    Used class Category for model, excluded field id """
+    Used class Category for model, fields name and slug"""
     class Meta:
-        exclude = ('id',)
+        fields = ('name', 'slug')
         model = Category
 
 
+class CategoryListSerializer(SparseFieldsSerializerMixin, CategorySerializer):
+    """Serializer created for the Category list
+    ?expand=titles_count adds the stored number of titles"""
+    class Meta(CategorySerializer.Meta):
+        fields = ('name', 'slug', 'titles_count')
+        expandable_fields = ('titles_count',)
+
+
 class GenreSerializer(serializers.ModelSerializer):
     """Serializer created for Genre
-    Used class Genre for model, excluded field id """
+    Used class Genre for model, fields name and slug"""
     class Meta:
-        exclude = ('id',)
+        fields = ('name', 'slug')
         model = Genre
 
 
+class GenreListSerializer(SparseFieldsSerializerMixin, GenreSerializer):
+    """Serializer created for the Genre list
+    ?expand=titles_count adds the stored number of titles"""
+    class Meta(GenreSerializer.Meta):
+        fields = ('name', 'slug', 'titles_count')
+        expandable_fields = ('titles_count',)
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Serializer created for Title
     Used class Title for model
@@ -100,27 +137,137 @@ class TitleSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class TitleSerializerReadOnly(serializers.ModelSerializer):
+class PrefetchedSlugRelatedField(serializers.SlugRelatedField):
+    """Looks the slug up in objects loaded for the whole batch,
+    context['related'][model] maps slugs to objects."""
+
+    def get_queryset(self):
+        return self.queryset
+
+    def to_internal_value(self, data):
+        related = self.context['related'][self.queryset.model]
+        if not isinstance(data, str):
+            self.fail('invalid')
+        if data not in related:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=data)
+        return related[data]
+
+
+class CategoryBulkSerializer(CategorySerializer):
+    """Item of a bulk category upsert, the slug is the key.
+    Uniqueness is checked for the whole batch at once."""
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {
+            'name': {'validators': []},
+            'slug': {'validators': []},
+        }
+
+
+class GenreBulkSerializer(GenreSerializer):
+    """Item of a bulk genre upsert, the slug is the key.
+    Uniqueness is checked for the whole batch at once."""
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {
+            'name': {'validators': []},
+            'slug': {'validators': []},
+        }
+
+
+class TitleBulkSerializer(TitleSerializer):
+    """Item of a bulk title upsert
+    an item with an id updates that title, without one creates a title,
+    genres and categories are resolved from the slugs of the batch"""
+    id = serializers.IntegerField(required=False)
+    genre = PrefetchedSlugRelatedField(
+        slug_field='slug',
+        queryset=Genre.objects.all(),
+        many=True
+    )
+    category = PrefetchedSlugRelatedField(
+        slug_field='slug',
+        queryset=Category.objects.all()
+    )
+
+
+class TitleStatsSerializer(serializers.Serializer):
+    """Serializer created for Title rating statistics
+    everything is derived from the stored score histogram,
+    the mean of all reviews is looked up once per serializer"""
+    id = serializers.IntegerField(read_only=True)
+    reviews_count = serializers.IntegerField(read_only=True)
+    rating = serializers.FloatField(read_only=True)
+    median = serializers.SerializerMethodField()
+    weighted_rating = serializers.SerializerMethodField()
+    histogram = serializers.SerializerMethodField()
+
+    def get_rating_mean(self):
+        if 'rating_mean' not in self.context:
+            self.context['rating_mean'] = ratings.rating_mean()
+        return self.context['rating_mean']
+
+    def get_median(self, title):
+        return ratings.median_score(title.histogram)
+
+    def get_weighted_rating(self, title):
+        return ratings.weighted_rating(title, self.get_rating_mean())
+
+    def get_histogram(self, title):
+        return {
+            str(score): count
+            for score, count in zip(SCORES, title.histogram)
+        }
+
+
+class TitleSerializerReadOnly(SparseFieldsSerializerMixin,
+                              serializers.ModelSerializer):
     """Serializer created for Title
     Used class Title for model
     three main arguments: rating, genre and category
-    works based on permissions"""
+    works based on permissions
+    ?expand=stats adds the rating statistics of every title"""
     rating = serializers.IntegerField(read_only=True)
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
+    stats = serializers.SerializerMethodField()
 
     class Meta:
         fields = (
-            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category',
+            'stats'
         )
+        expandable_fields = ('stats',)
         model = Title
 
+    def get_stats(self, title):
+        return TitleStatsSerializer(title, context=self.context).data
+
 
-class ReviewSerializer(serializers.ModelSerializer):
+class LeaderboardTitleSerializer(serializers.ModelSerializer):
+    """Serializer created for the titles of a leaderboard
+    only the columns read with the board"""
+    class Meta:
+        fields = ('id', 'name', 'year')
+        model = Title
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """Serializer created for LeaderboardEntry
+    rating and number of reviews stored with the board"""
+    title = LeaderboardTitleSerializer(read_only=True)
+
+    class Meta:
+        fields = ('title', 'rating', 'reviews_count')
+        model = LeaderboardEntry
+
+
+class ReviewSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     """Serializer created for Review
     Used class Review for model
     the main argument: author
-    validation optimizes that only one review per title is allowed"""
+    only one review per title is allowed, the view turns
+    the unique_review violation into a validation error"""
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -131,17 +278,18 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
-        if self.context['request'].method == 'POST':
-            author = self.context['request'].user
-            title = self.context['view'].kwargs.get('title_id')
-            if author.reviews.filter(title=title).exists():
-                raise serializers.ValidationError(
-                    'Only one review per title is allowed')
-        return data
+
+class ReviewSearchSerializer(ReviewSerializer):
+    """Serializer created for Review search results
+    adds the title the review belongs to"""
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     """Serializer created for Comment
     Used class Comment for model"""
     author = serializers.SlugRelatedField(
@@ -0,0 +1,84 @@
+import time
+
+from api.authentication import mark_user_changed
+from api.cache import invalidate_on_commit
+from api.metrics import count_query
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from api_yamdb.db.health import check_connections
+
+WRITE_SIGNALS = (post_save, post_delete)
+
+
+@receiver(WRITE_SIGNALS, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    invalidate_on_commit('categories', 'titles')
+
+
+@receiver(WRITE_SIGNALS, sender=Genre)
+def invalidate_genres(sender, **kwargs):
+    invalidate_on_commit('genres', 'titles')
+
+
+@receiver(WRITE_SIGNALS, sender=Title)
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_titles(sender, action='post_save', **kwargs):
+    if action.startswith('post'):
+        # genres and categories show their titles_count
+        invalidate_on_commit('titles', 'genres', 'categories')
+
+
+@receiver(WRITE_SIGNALS, sender=Review)
+def invalidate_reviews(sender, instance, **kwargs):
+    # the stored rating shown in titles changes with every review
+    invalidate_on_commit(f'reviews:{instance.title_id}', 'titles')
+
+
+@receiver(WRITE_SIGNALS, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    invalidate_on_commit(f'comments:{instance.review_id}')
+
+
+@receiver(pre_save, sender=User)
+def check_username(sender, instance, update_fields=None, **kwargs):
+    instance.username_changed = instance.pk is not None and (
+        update_fields is None or 'username' in update_fields
+    ) and User.objects.filter(pk=instance.pk).exclude(
+        username=instance.username
+    ).exists()
+
+
+@receiver(WRITE_SIGNALS, sender=User)
+def revoke_token_claims(sender, instance, created=False, **kwargs):
+    if not created:
+        mark_user_changed(instance.pk, int(time.time()))
+
+
+@receiver(post_save, sender=User)
+def invalidate_authored(sender, instance, **kwargs):
+    # reviews and comments show the username of their author
+    if not getattr(instance, 'username_changed', False):
+        return
+    invalidate_on_commit(
+        *(f'reviews:{pk}' for pk in Review.objects.filter(
+            author=instance
+        ).order_by().values_list('title_id', flat=True).distinct()),
+        *(f'comments:{pk}' for pk in Comment.objects.filter(
+            author=instance
+        ).order_by().values_list('review_id', flat=True).distinct())
+    )
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    # the wrapper list outlives reconnects of the same connection
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+request_started.connect(check_connections)
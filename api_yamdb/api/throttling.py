@@ -0,0 +1,183 @@
+"""Token bucket throttling of the auth and write endpoints.
+
+A bucket holds up to N tokens and refills at N per period, for the rate
+'N/period' of the scope in DEFAULT_THROTTLE_RATES. Every request takes
+one token, without one it is rejected with 429 and a Retry-After header.
+A scope without a rate is not throttled.
+
+THROTTLE_STORE selects where buckets live: 'cache' (default) keeps them
+in the 'throttle' cache, apart from the API responses that would crowd
+them out, shared by all workers if the cache is; 'local' keeps
+them in the memory of the process, the cheapest, but every worker then
+has its own limits. A dotted path of a store class is accepted as well.
+"""
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'N/period' as (capacity, seconds to refill the bucket),
+    the period is second, minute, hour or day, as in DRF."""
+    capacity, period = rate.split('/')
+    return int(capacity), PERIODS[period[0]]
+
+
+def take_token(bucket, capacity, period, now):
+    """Refills the (tokens, updated) bucket up to now and takes a token.
+    Returns the new bucket and the seconds to wait, 0 when allowed."""
+    tokens, updated = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class LocalBucketStore:
+    """Buckets in the memory of the process. A bucket untouched for
+    its period is full again, such buckets are dropped once there are
+    more than max_buckets."""
+    max_buckets = 100000
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def prune(self, now):
+        self.buckets = {
+            key: bucket for key, bucket in self.buckets.items()
+            if bucket[2] > now
+        }
+
+    def take(self, key, capacity, period, now):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            bucket, wait = take_token(bucket and bucket[:2], capacity,
+                                      period, now)
+            self.buckets[key] = (*bucket, now + period)
+            if len(self.buckets) > self.max_buckets:
+                self.prune(now)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets in the throttle cache, they expire when full again. The
+    read and the write are not atomic, requests racing for the last token
+    of a bucket may all get it."""
+
+    def take(self, key, capacity, period, now):
+        cache = caches[settings.THROTTLE_CACHE_ALIAS]
+        cache_key = f'api:throttle:{key}'
+        bucket, wait = take_token(cache.get(cache_key), capacity, period, now)
+        cache.set(cache_key, bucket, period)
+        return wait
+
+
+STORES = {
+    'local': LocalBucketStore(),
+    'cache': CacheBucketStore(),
+}
+
+
+def get_store():
+    name = settings.THROTTLE_STORE
+    if name not in STORES:
+        STORES[name] = import_string(name)()
+    return STORES[name]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Takes a token from the bucket of every key of the request,
+    the request is allowed only if all of them had one."""
+    scope = None
+
+    def get_keys(self, request, view):
+        raise NotImplementedError('.get_keys() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        if rate is None:
+            return True
+        capacity, period = parse_rate(rate)
+        store = get_store()
+        now = time.time()
+        for key in self.get_keys(request, view):
+            self.wait_seconds = max(self.wait_seconds, store.take(
+                f'{self.scope}:{key}', capacity, period, now
+            ))
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AddressThrottle(TokenBucketThrottle):
+    """One bucket per client IP address, see NUM_PROXIES of DRF."""
+
+    def get_keys(self, request, view):
+        return (self.get_ident(request),)
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """One bucket per value of each of the fields of the request body,
+    so one account can not be hammered from many addresses."""
+    fields = ()
+
+    def get_keys(self, request, view):
+        data = request.data
+        if not hasattr(data, 'get'):
+            return ()
+        values = ((field, data.get(field)) for field in self.fields)
+        return tuple(
+            f'{field}:{value.lower()}' for field, value in values
+            if isinstance(value, str) and value
+        )
+
+
+class CreateThrottle(TokenBucketThrottle):
+    """One bucket per user, for the create action of a viewset only."""
+
+    def get_keys(self, request, view):
+        if getattr(view, 'action', None) != 'create':
+            return ()
+        return (request.user.pk,)
+
+
+class SignUpThrottle(AddressThrottle):
+    scope = 'signup'
+
+
+class SignUpIdentityThrottle(IdentityThrottle):
+    scope = 'signup_identity'
+    fields = ('username', 'email')
+
+
+class TokenThrottle(AddressThrottle):
+    scope = 'token'
+
+
+class TokenIdentityThrottle(IdentityThrottle):
+    scope = 'token_identity'
+    fields = ('username',)
+
+
+class ReviewCreateThrottle(CreateThrottle):
+    scope = 'review_create'
+
+
+class CommentCreateThrottle(CreateThrottle):
+    scope = 'comment_create'
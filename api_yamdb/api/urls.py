@@ -1,6 +1,7 @@
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet, get_token,
-                       sign_up)
+                       ReviewSearchViewSet, ReviewViewSet, TitleViewSet,
+                       TopViewSet, UserViewSet, changes, export_data,
+                       get_token, metrics, sign_up)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -16,11 +17,19 @@ router_v1.register(
     CommentViewSet,
     basename='comment',
 )
+router_v1.register(
+    r'reviews/search', ReviewSearchViewSet, basename='review-search'
+)
+router_v1.register(r'top', TopViewSet, basename='top')
 router_v1.register(r'users', UserViewSet)
 
 
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', sign_up, name='signup'),
-    path('v1/auth/token/', get_token, name='token')
+    path('v1/auth/token/', get_token, name='token'),
+    path('v1/_metrics', metrics, name='metrics'),
+    path('v1/changes/', changes, name='changes'),
+    path('v1/export/<slug:dataset>.<slug:extension>', export_data,
+         name='export'),
 ]
@@ -1,54 +1,79 @@
-from api.filters import TitleFilter
-from api.mixins import CreateDestroyListMixin
+from api.async_views import AsyncViewMixin
+from api.authentication import RoleAccessToken
+from api.bulk import SlugBulkUpsertMixin, TitleBulkUpsertMixin
+from api.cache import CachedResponseMixin, latest
+from api.changes import read_page
+from api.filters import FullTextSearchFilter, TitleFilter, TitleOrdering
+from api.metrics import registry
+from api.mixins import (CreateDestroyListMixin, SparseFieldsMixin,
+                        TimedSerializerMixin)
+from api.pagination import PubDatePagination, TitlePagination
 from api.permissions import (IsAdmin, IsAdminOrModeratorOrAuthor,
                              IsAdminOrReadOnly)
-from api.serializers import (CategorySerializer, CommentSerializer,
-                             GenreSerializer, ProfileSerializer,
+from api.ratings import rating_mean
+from api.serializers import (CategoryBulkSerializer, CategoryListSerializer,
+                             CommentSerializer, GenreBulkSerializer,
+                             GenreListSerializer, LeaderboardEntrySerializer,
+                             ProfileSerializer, ReviewSearchSerializer,
                              ReviewSerializer, SignUpSerializer,
-                             TitleSerializer, TitleSerializerReadOnly,
+                             TitleBulkSerializer, TitleSerializer,
+                             TitleSerializerReadOnly, TitleStatsSerializer,
                              TokenSerializer, UserSerializer)
+from api.throttling import (CommentCreateThrottle, ReviewCreateThrottle,
+                            SignUpIdentityThrottle, SignUpThrottle,
+                            TokenIdentityThrottle, TokenThrottle)
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError
+from django.db.models import Count, Max, OuterRef
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
+from rest_framework.mixins import ListModelMixin
 from rest_framework.permissions import (AllowAny, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import GenericViewSet
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews import export, leaderboards
+from reviews.models import (SCORES, Category, Comment, Genre, LeaderboardEntry,
+                            OutgoingEmail, Review, Title, Tombstone, User)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignUpThrottle, SignUpIdentityThrottle])
 def sign_up(request):
     """New User Registration
     Receiving a confirmation code to the sent_mail.
     Permissions: Available without a token.
-    The email and username fields must be unique."""
+    The email and username fields must be unique.
+    Throttled per IP address and per username and email."""
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user, created = User.objects.get_or_create(**serializer.validated_data)
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    # sent by the send_emails worker, signup never waits for the mail server
+    OutgoingEmail.objects.create(
         subject='YaMDb registration',
         message=f'Your confirmation code: {confirmation_code}',
-        from_email=None,
-        recipient_list=(user.email,),
+        recipient=user.email,
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenThrottle, TokenIdentityThrottle])
 def get_token(request):
     """Receiving JWT-TOKEN
     Getting a JWT token in exchange for username and confirmation code.
-    Permissions: Available without a token."""
+    Permissions: Available without a token.
+    Throttled per IP address and per username."""
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     user = get_object_or_404(
@@ -59,13 +84,66 @@ def get_token(request):
     if default_token_generator.check_token(
             user, serializer.validated_data['confirmation_code']
     ):
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def metrics(request):
+    """Request metrics of this worker in the Prometheus text format
+    Permissions: Administrator"""
+    return HttpResponse(
+        registry.prometheus(), content_type='text/plain; version=0.0.4'
+    )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def changes(request):
+    """Changes of categories, genres, titles and reviews for clients
+    that keep a copy of the catalog, oldest first
+    Permissions: Available without a token
+    ?since= is the next token of the previous page, without it the feed
+    starts from the beginning; deleted objects come with their slug
+    or id only"""
+    try:
+        page = read_page(
+            request.query_params.get('since'), {'request': request}
+        )
+    except ValueError as error:
+        raise ValidationError({'since': [str(error)]})
+    return Response(page)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export_data(request, dataset, extension):
+    """Streaming export of a whole table in the load_data csv format
+    or as NDJSON, e.g. /api/v1/export/review.csv
+    Permissions: Administrator
+    ?since= exports reviews and comments published at or after the date"""
+    if dataset not in export.EXPORTS or extension not in export.LINES:
+        raise NotFound()
+    since = request.query_params.get('since')
+    try:
+        if since is not None:
+            since = export.parse_since(since)
+        chunks = export.stream(dataset, extension, since=since)
+    except ValueError as error:
+        raise ValidationError({'since': [str(error)]})
+    response = StreamingHttpResponse(
+        chunks, content_type=export.CONTENT_TYPES[extension]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{dataset}.{extension}"'
+    )
+    return response
+
+
+class UserViewSet(TimedSerializerMixin, viewsets.ModelViewSet):
     """Getting a list of all users
     Access rights(permissions): Administrator
     Searching by username (username)
@@ -87,8 +165,12 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer_class=ProfileSerializer
     )
     def set_profile(self, request, pk=None):
+        user = request.user
+        if user.get_deferred_fields():
+            # built from token claims only, load the whole profile at once
+            user = User.objects.get(pk=user.pk)
         serializer = self.get_serializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -97,57 +179,183 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryViewSet(CreateDestroyListMixin, GenericViewSet):
+class CategoryViewSet(SparseFieldsMixin, TimedSerializerMixin,
+                      CachedResponseMixin, SlugBulkUpsertMixin,
+                      CreateDestroyListMixin, GenericViewSet):
     """Getting a list of all categories
     Permissions: Available without a token
-    Searching by name"""
+    Searching by name
+    Bulk upsert by slug: Administrator
+    ?expand=titles_count adds the number of titles"""
     queryset = Category.objects.all()
-    serializer_class = CategorySerializer
+    serializer_class = CategoryListSerializer
+    bulk_serializer_class = CategoryBulkSerializer
+    bulk_invalidates = ('categories', 'titles')
+    cache_scope = 'categories'
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
 
 
-class GenreViewSet(CreateDestroyListMixin, GenericViewSet):
+class GenreViewSet(SparseFieldsMixin, TimedSerializerMixin,
+                   CachedResponseMixin, SlugBulkUpsertMixin,
+                   CreateDestroyListMixin, GenericViewSet):
     """Getting a list of all genres
     Permissions: Available without a token
-    Searching by name"""
+    Searching by name
+    Bulk upsert by slug: Administrator
+    ?expand=titles_count adds the number of titles"""
     queryset = Genre.objects.all()
-    serializer_class = GenreSerializer
+    serializer_class = GenreListSerializer
+    bulk_serializer_class = GenreBulkSerializer
+    bulk_invalidates = ('genres', 'titles')
+    cache_scope = 'genres'
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(AsyncViewMixin, SparseFieldsMixin, TimedSerializerMixin,
+                   CachedResponseMixin, TitleBulkUpsertMixin,
+                   viewsets.ModelViewSet):
     """Getting a list of all titles with rating
-    Permissions: Available without a token"""
-    queryset = Title.objects.all().annotate(
-        rating=Avg('reviews__score')).order_by('name')
+    Permissions: Available without a token
+    Bulk upsert by id: Administrator
+    Rating statistics of a title: /titles/{id}/stats/
+    Filters: genre and category (comma separated slugs), name, year,
+    year_min, year_max and rating_min
+    ?ordering= name, year, rating or weighted_rating, -field reverses
+    ?fields= and ?expand=stats select the fields of the response"""
+    queryset = Title.objects.all().order_by('name', 'id')
     serializer_class = TitleSerializer
+    bulk_serializer_class = TitleBulkSerializer
+    pagination_class = TitlePagination
+    cache_scope = 'titles'
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (
+        DjangoFilterBackend, FullTextSearchFilter, TitleOrdering
+    )
     filterset_class = TitleFilter
+    field_columns = {
+        'rating': ('reviews_count', 'score_sum'),
+        'genre': (),
+        'stats': (
+            'reviews_count', 'score_sum',
+            *(f'score_{score}' for score in SCORES)
+        ),
+    }
+    field_select_related = {'category': ('category',)}
+    field_prefetch_related = {'genre': ('genre',)}
+
+    def get_queryset(self):
+        if self.action in self.sparse_actions:
+            return self.sparse_queryset(super().get_queryset())
+        return super().get_queryset()
+
+    def uses_rating_mean(self):
+        ordering = self.request.query_params.get(TitleOrdering.ordering_param)
+        return (
+            self.action == 'stats'
+            or 'stats' in (self.get_query_names(self.expand_param) or ())
+            or 'weighted_rating' in (ordering or '')
+        )
+
+    def get_validators(self):
+        if self.action == 'list':
+            # deleted titles, genres and categories leave tombstones
+            stamps = tuple(
+                model.objects.aggregate(stamp=Max(field))['stamp']
+                for model, field in (
+                    (Title, 'updated_at'), (Genre, 'updated_at'),
+                    (Category, 'updated_at'), (Tombstone, 'deleted_at')
+                )
+            )
+        elif self.action in ('retrieve', 'stats'):
+            try:
+                stamps = Title.objects.filter(pk=self.kwargs['pk']).annotate(
+                    genres=Max('genre__updated_at')
+                ).values_list('updated_at', 'category__updated_at',
+                              'genres').first()
+            except ValueError:
+                return None
+            if stamps is None:
+                return None
+        else:
+            return None
+        last_modified = max(filter(None, stamps), default=None)
+        if self.uses_rating_mean():
+            # the mean of all reviews moves without the title changing
+            return (*stamps, rating_mean()), None
+        return stamps, last_modified
 
     def get_serializer_class(self):
         if self.action in ('retrieve', 'list'):
             return TitleSerializerReadOnly
+        if self.action == 'stats':
+            return TitleStatsSerializer
         return TitleSerializer
 
+    @action(detail=True, methods=('get',))
+    def stats(self, request, pk=None):
+        return self.cached_response(self.retrieve_stats, request, pk=pk)
+
+    def retrieve_stats(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(AsyncViewMixin, SparseFieldsMixin, TimedSerializerMixin,
+                    CachedResponseMixin, viewsets.ModelViewSet):
     """Getting a list of all titles with rating
     Permissions: Available without a token
     the function provides with access rights to add a new review,
-    receive or delete a review by title_id """
+    receive or delete a review by title_id
+    ?fields= selects the fields of the response"""
     http_method_names = ['get', 'post', 'patch', 'delete']
     serializer_class = ReviewSerializer
+    pagination_class = PubDatePagination
+    throttle_classes = (ReviewCreateThrottle,)
+    required_columns = ('title',)
+    field_columns = {'author': ('author__username',)}
+    field_select_related = {'author': ('author',)}
+
+    def get_cache_scope(self):
+        return f'reviews:{self.kwargs.get("title_id")}'
+
+    def get_validators(self):
+        if self.action == 'list':
+            # the title moves with every added, deleted or rescored review
+            stamps = Title.objects.filter(pk=self.kwargs['title_id']).annotate(
+                reviews_updated=latest(
+                    Review.objects.filter(title=OuterRef('pk'))
+                )
+            ).values_list('updated_at', 'reviews_updated').first()
+        elif self.action == 'retrieve':
+            try:
+                stamps = Review.objects.filter(
+                    pk=self.kwargs['pk'], title_id=self.kwargs['title_id']
+                ).values_list('updated_at').first()
+            except ValueError:
+                return None
+        else:
+            return None
+        if stamps is None:
+            return None
+        return stamps, max(filter(None, stamps))
+
+    def get_title(self):
+        """The title from the url, loaded once per request."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        if self.action in self.sparse_actions:
+            return self.sparse_queryset(self.get_title().reviews.all())
+        return self.get_title().reviews.select_related('author')
 
     def get_permissions(self):
         if self.action in ('partial_update', 'destroy'):
@@ -155,22 +363,123 @@ class ReviewViewSet(viewsets.ModelViewSet):
         return (IsAuthenticatedOrReadOnly(),)
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        )
+        # the unique_review constraint is the only check of duplicates,
+        # the title exists, so an integrity error means a second review
+        try:
+            serializer.save(author=self.request.user, title=self.get_title())
+        except IntegrityError:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Only one review per title is allowed'
+            ]})
+
+
+class ReviewSearchViewSet(SparseFieldsMixin, TimedSerializerMixin,
+                          ListModelMixin, GenericViewSet):
+    """Full-text search over the texts of all reviews
+    Permissions: Available without a token
+    Results are ranked by relevance, ?search= is required
+    ?fields= selects the fields of the response"""
+    queryset = Review.objects.all()
+    serializer_class = ReviewSearchSerializer
+    permission_classes = (AllowAny,)
+    filter_backends = (FullTextSearchFilter,)
+    search_required = True
+    field_columns = {'author': ('author__username',)}
+    field_select_related = {'author': ('author',)}
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class TopViewSet(TimedSerializerMixin, ListModelMixin, GenericViewSet):
+    """Best rated titles of a genre, a category or a year
+    Permissions: Available without a token
+    One of ?genre=<slug>, ?category=<slug> or ?year= is required,
+    titles need LEADERBOARD_MIN_REVIEWS reviews to get on a board"""
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = (AllowAny,)
+    pagination_class = None
+    boards = {
+        'genre': 'genre__slug', 'category': 'category__slug', 'year': 'year'
+    }
+
+    def get_queryset(self):
+        boards = [
+            (lookup, self.request.query_params[param])
+            for param, lookup in self.boards.items()
+            if param in self.request.query_params
+        ]
+        if len(boards) != 1:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Exactly one of genre, category or year is required'
+            ]})
+        lookup, value = boards[0]
+        if lookup == 'year' and not value.lstrip('-').isdigit():
+            raise ValidationError({'year': ['A valid integer is required.']})
+        # the board index serves the whole read, titles are joined by pk,
+        # the empty places of deleted titles wait for the worker
+        return LeaderboardEntry.objects.filter(
+            **{lookup: value}, title__isnull=False
+        ).select_related('title').only(
+            'rating', 'reviews_count', 'title__name', 'title__year'
+        ).order_by(*leaderboards.RANKING)
+
+
+class CommentViewSet(AsyncViewMixin, SparseFieldsMixin, TimedSerializerMixin,
+                     CachedResponseMixin, viewsets.ModelViewSet):
     """Getting a list of all Comments
     Permissions: Available without a token
     the function provides with access rights to add a new comment,
-    receive or delete a comment by review_id"""
+    receive or delete a comment by review_id
+    ?fields= selects the fields of the response"""
     serializer_class = CommentSerializer
+    pagination_class = PubDatePagination
+    throttle_classes = (CommentCreateThrottle,)
+    required_columns = ('review',)
+    field_columns = {'author': ('author__username',)}
+    field_select_related = {'author': ('author',)}
+
+    def get_cache_scope(self):
+        return f'comments:{self.kwargs.get("review_id")}'
+
+    def get_validators(self):
+        reviews = Review.objects.filter(
+            pk=self.kwargs['review_id'], title_id=self.kwargs['title_id']
+        )
+        if self.action == 'list':
+            # deleted comments only show in the count
+            stamps = reviews.annotate(
+                comments_updated=latest(
+                    Comment.objects.filter(review=OuterRef('pk'))
+                ),
+                comments_count=Count('comments')
+            ).values_list('comments_updated', 'comments_count').first()
+            return None if stamps is None else (stamps, None)
+        if self.action != 'retrieve':
+            return None
+        try:
+            stamps = Comment.objects.filter(
+                pk=self.kwargs['pk'], review__in=reviews
+            ).values_list('updated_at').first()
+        except ValueError:
+            return None
+        return None if stamps is None else (stamps, stamps[0])
+
+    def get_review(self):
+        """The review from the url, loaded once per request.
+        It must belong to the title from the url."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self._review
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        if self.action in self.sparse_actions:
+            return self.sparse_queryset(self.get_review().comments.all())
+        return self.get_review().comments.select_related('author')
 
     def get_permissions(self):
         if self.action in ('partial_update', 'destroy'):
@@ -178,7 +487,4 @@ class CommentViewSet(viewsets.ModelViewSet):
         return (IsAuthenticatedOrReadOnly(),)
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            review=get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        )
+        serializer.save(author=self.request.user, review=self.get_review())
@@ -1,7 +1,13 @@
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from api_yamdb.handlers import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# the read-heavy viewsets get async entry points in the ASGI mode
+os.environ.setdefault('ASYNC_VIEWS', 'True')
 
-application = get_asgi_application()
+# get_asgi_application with the handler streaming from the views' thread
+django.setup(set_prefix=False)
+application = ASGIHandler()
@@ -0,0 +1,7 @@
+from django.db.backends.postgresql import base
+
+from api_yamdb.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """PostgreSQL with the in-process connection pool."""
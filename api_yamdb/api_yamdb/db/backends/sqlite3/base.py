@@ -0,0 +1,8 @@
+from django.db.backends.sqlite3 import base
+
+from api_yamdb.db.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    """SQLite with the in-process connection pool, stands in for
+    PostgreSQL in tests."""
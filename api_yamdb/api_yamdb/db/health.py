@@ -0,0 +1,12 @@
+from django.db import connections
+
+
+def check_connections(**kwargs):
+    """Closes open persistent connections that stopped working before
+    a request reuses them, what CONN_HEALTH_CHECKS does in later Django
+    versions."""
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.is_usable()):
+            connection.close()
@@ -0,0 +1,118 @@
+"""In-process pool of DataBase connections.
+
+With CONN_MAX_AGE = 0 Django closes the connection at the end of every
+request. A pooled backend hands the raw connection back to the pool of
+its DataBase instead, and the next request of any thread takes it from
+there. The pool also caps the number of connections of the process,
+which matters in the ASGI mode where views run in many threads.
+"""
+import queue
+import threading
+from functools import partial
+
+POOLS = {}
+POOLS_LOCK = threading.Lock()
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+def close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+def ping(raw):
+    try:
+        cursor = raw.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+        raw.rollback()
+    except Exception:
+        return False
+    return True
+
+
+class ConnectionPool:
+    """At most size connections are handed out at once, an idle one
+    is reused before a new one is opened."""
+
+    def __init__(self, size, timeout):
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.timeout = timeout
+
+    def get(self, connect, check):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError(
+                f'No free connection in the pool after {self.timeout}s'
+            )
+        try:
+            while True:
+                try:
+                    raw = self.idle.get_nowait()
+                except queue.Empty:
+                    return connect()
+                if check(raw):
+                    return raw
+                close_quietly(raw)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, raw, reuse):
+        try:
+            if reuse:
+                self.idle.put(raw)
+            else:
+                close_quietly(raw)
+        finally:
+            self.slots.release()
+
+
+class PooledDatabaseWrapperMixin:
+    """Takes raw connections from the pool of the DataBase and gives
+    them back on close. Settings: POOL_SIZE (10) and POOL_TIMEOUT,
+    seconds to wait for a free connection (10); with CONN_HEALTH_CHECKS
+    idle connections are pinged before they are reused."""
+
+    def get_pool(self):
+        key = (self.alias, self.settings_dict['NAME'])
+        with POOLS_LOCK:
+            if key not in POOLS:
+                POOLS[key] = ConnectionPool(
+                    self.settings_dict.get('POOL_SIZE') or 10,
+                    self.settings_dict.get('POOL_TIMEOUT', 10)
+                )
+            return POOLS[key]
+
+    def get_new_connection(self, conn_params):
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            check = ping
+        else:
+            def check(raw):
+                return True
+        try:
+            return self.get_pool().get(
+                partial(super().get_new_connection, conn_params), check
+            )
+        except PoolTimeoutError as error:
+            raise self.Database.OperationalError(str(error))
+
+    def reusable(self):
+        if self.errors_occurred and not self.is_usable():
+            return False
+        try:
+            # nothing of this request may leak into the next one
+            self.connection.rollback()
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        self.get_pool().put(self.connection, self.reusable())
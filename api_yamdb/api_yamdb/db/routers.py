@@ -0,0 +1,28 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReplicaRouter:
+    """Sends reads to the settings.DATABASE_REPLICA alias while
+    read_from_replica is set: ReplicaMiddleware sets it for the
+    safe-method requests. Writes and every query of other requests
+    go to the default DataBase, so a request never reads its own
+    writes from a lagging replica."""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICA and read_from_replica.get():
+            return settings.DATABASE_REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        # explicit, otherwise objects read from the replica
+        # would be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the default DataBase
+        return True
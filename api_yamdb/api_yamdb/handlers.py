@@ -0,0 +1,52 @@
+"""ASGI handler sending streaming responses from the thread of the views.
+
+Django 3.2 iterates a streaming response inside the event loop, so the
+queries of a streamed queryset, e.g. the export of reviews.export, raise
+SynchronousOnlyOperation once the headers are already sent and the
+client gets a truncated file. Here every chunk is read through
+sync_to_async in the thread the sync view ran in, with its connection.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+
+
+def response_headers(response):
+    """Headers and cookies of the response, as ASGI expects them."""
+    headers = []
+    for header, value in response.items():
+        if isinstance(header, str):
+            header = header.encode('ascii')
+        if isinstance(value, str):
+            value = value.encode('latin1')
+        headers.append((bytes(header), bytes(value)))
+    for cookie in response.cookies.values():
+        headers.append(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+        )
+    return headers
+
+
+class ASGIHandler(asgi.ASGIHandler):
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response_headers(response),
+        })
+        parts = iter(response)
+        read = sync_to_async(next, thread_sensitive=True)
+        part = await read(parts, None)
+        while part is not None:
+            for chunk, _ in self.chunk_bytes(part):
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            part = await read(parts, None)
+        await send({'type': 'http.response.body'})
+        await sync_to_async(response.close, thread_sensitive=True)()
@@ -1,4 +1,5 @@
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -31,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,6 +43,23 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('METRICS_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -63,15 +83,92 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': str(os.getenv('ENGINE', default='django.db.backends.postgresql')),
-        'NAME': str(os.getenv('ENGINE', default='db')),
-        'USER': str(os.getenv('ENGINE', default='postgres')),
-        'PASSWORD': str(os.getenv('ENGINE', default='postgres')),
-        'HOST': str(os.getenv('ENGINE', default='db')),
-        'PORT': str(os.getenv('ENGINE', default='5432'))
+        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'NAME': os.getenv('DB_NAME', default='db'),
+        'USER': os.getenv('POSTGRES_USER', default='postgres'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
+        'HOST': os.getenv('DB_HOST', default='db'),
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # checked before reuse by api_yamdb.db.health
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+        # used by the pooled backends of api_yamdb.db.backends
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', default=10)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+    }
+}
+
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+
+# alias safe-method requests read from, see api_yamdb.db.routers
+DATABASE_REPLICA = 'replica' if 'replica' in DATABASES else None
+
+DATABASE_ROUTERS = ['api_yamdb.db.routers.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    },
+    # token revocation markers, apart from the API responses so they are
+    # never culled to make room for them, see api/authentication.py
+    'auth': {
+        'BACKEND': os.getenv('AUTH_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('AUTH_CACHE_LOCATION', default='auth'),
+    },
+    # throttle buckets, a culled bucket is a full one, see api/throttling.py
+    'throttle': {
+        'BACKEND': os.getenv('THROTTLE_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', default='throttle'),
+    },
 }
 
+# backends that cull entries above MAX_ENTRIES, a marker must outlive
+# the tokens it revokes and a bucket its period
+for alias in ('auth', 'throttle'):
+    if CACHES[alias]['BACKEND'] in (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.filebased.FileBasedCache',
+        'django.core.cache.backends.db.DatabaseCache',
+    ):
+        CACHES[alias]['OPTIONS'] = {'MAX_ENTRIES': sys.maxsize}
+
+AUTH_CACHE_ALIAS = 'auth'
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+API_CACHE_ALIAS = os.getenv('API_CACHE_ALIAS', default='default')
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', default=1000))
+
+# Weighted rating: the rating of a title is pulled towards the mean of all
+# reviews as if it had RATING_PRIOR_WEIGHT more reviews with that score.
+RATING_PRIOR_WEIGHT = int(os.getenv('RATING_PRIOR_WEIGHT', default=10))
+
+RATING_MEAN_TIMEOUT = int(os.getenv('RATING_MEAN_TIMEOUT', default=300))
+
+# Leaderboards of genres, categories and years: titles per board and
+# reviews a title needs to get on one.
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', default=100))
+LEADERBOARD_MIN_REVIEWS = int(
+    os.getenv('LEADERBOARD_MIN_REVIEWS', default=10)
+)
+
+# Change feed: items per page, age of the rows it waits for before
+# serving them (besides the open transactions, it must cover the replica
+# lag) and days the tombstones of deleted objects are kept.
+CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', default=500))
+CHANGES_SETTLE_SECONDS = int(os.getenv('CHANGES_SETTLE_SECONDS', default=5))
+CHANGES_RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', default=90))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -106,18 +203,52 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'admin@yamdb.com'
 
+# seconds before the first retry of a failed email, doubled on every failure
+EMAIL_RETRY_DELAY = 30
+
+# set by asgi.py, see api/async_views.py
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+
+# Stateless authentication trusts the role claims of the token and relies
+# on the 'auth' cache for revocation, enable it only with a cache shared by
+# all workers that does not evict entries.
+JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', default='False') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # orjson when it is installed, see api/renderers.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # nginx of infra/ appends the client address to X-Forwarded-For, the
+    # per address buckets take the last one, earlier ones can be forged
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+    # token buckets of api/throttling.py, None turns a scope off
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': os.getenv('THROTTLE_SIGNUP', default='5/min'),
+        'signup_identity': os.getenv('THROTTLE_SIGNUP_IDENTITY', default='3/hour'),
+        'token': os.getenv('THROTTLE_TOKEN', default='10/min'),
+        'token_identity': os.getenv('THROTTLE_TOKEN_IDENTITY', default='5/min'),
+        'review_create': os.getenv('THROTTLE_REVIEW_CREATE', default='30/hour'),
+        'comment_create': os.getenv('THROTTLE_COMMENT_CREATE', default='120/hour'),
+    },
 }
 
+# 'cache' shares the buckets through the 'throttle' cache, 'local' keeps
+# them per process
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', default='cache')
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
@@ -1,41 +1,73 @@
 from django.contrib import admin
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, OutgoingEmail, Review,
+                            Title, User)
+from reviews.paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist of a table with millions of rows: the total is the
+    planner estimate on PostgreSQL and filtered lists do not count
+    the whole table a second time."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class UserAdmin(admin.ModelAdmin):
     list_display = (
         'pk', 'username', 'email', 'first_name', 'last_name', 'bio', 'role'
     )
+    search_fields = ('username', 'email')
 
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'slug')
+    search_fields = ('name', 'slug')
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('pk', 'review', 'text', 'author', 'pub_date')
+    list_select_related = ('review', 'author')
+    raw_id_fields = ('review',)
+    autocomplete_fields = ('author',)
 
 
 class GenreAdmin(admin.ModelAdmin):
     list_display = ('pk', 'name', 'slug')
 
 
-class ReviewAdmin(admin.ModelAdmin):
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'created', 'attempts', 'next_attempt',
+        'sent'
+    )
+    list_filter = ('sent',)
+
+
+class ReviewAdmin(LargeTableAdmin):
     list_display = ('pk', 'title', 'text', 'author', 'score', 'pub_date')
+    list_select_related = ('title', 'author')
+    autocomplete_fields = ('title', 'author')
 
 
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(LargeTableAdmin):
     def list_genres(self, title):
-        return title.genres.values_list('name', flat=True)
+        return ', '.join(genre.name for genre in title.genre.all())
     list_genres.short_description = 'Список жанров'
     list_display = (
         'pk', 'name', 'year', 'description', 'list_genres', 'category'
     )
+    list_select_related = ('category',)
+    autocomplete_fields = ('category',)
+    search_fields = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('genre')
 
 
 admin.site.register(User, UserAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Genre, GenreAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Title, TitleAdmin)
@@ -0,0 +1,223 @@
+"""Leaderboards of the best rated titles of every genre, category and year.
+
+A board holds the LEADERBOARD_SIZE titles with the highest rating, then
+the most reviews, among the titles with at least LEADERBOARD_MIN_REVIEWS
+reviews. Every title off a board ranks below the last title on it, so
+after one title changes only the best title off the board may have to
+move in.
+
+The writes that change the rating, genres, category or year of a title
+only flag it with leaderboard_pending, in the query they run anyway, and
+a deleted title leaves its places empty. The update_leaderboards worker
+moves the flagged titles and refills the empty places off the request
+path; rebuild_leaderboards builds the boards from scratch. Every step
+puts a title where it belongs, whatever the board holds, so running it
+again, or in two workers at once, changes nothing more.
+"""
+from django.conf import settings
+from django.db import transaction
+from reviews.models import (Category, Genre, LeaderboardEntry, Title,
+                            rating_expression)
+
+# board field of the entries and the title filter of its candidates
+BOARD_FIELDS = {'genre_id': 'genre', 'category_id': 'category_id',
+                'year': 'year'}
+RANKING = ('-rating', '-reviews_count', 'title_id')
+
+
+def min_reviews():
+    return max(settings.LEADERBOARD_MIN_REVIEWS, 1)
+
+
+def rank(rating, reviews_count, title_id):
+    """Sort key of the RANKING order, the best first."""
+    return (-rating, -reviews_count, title_id)
+
+
+def places(board):
+    """Entries of the board, the empty places of deleted titles too."""
+    field, value = board
+    return LeaderboardEntry.objects.filter(**{field: value})
+
+
+def entries(board):
+    return places(board).exclude(title=None)
+
+
+def candidates(board):
+    """Titles that belong on the board by rating, the best first."""
+    field, value = board
+    return Title.objects.filter(
+        **{BOARD_FIELDS[field]: value}, reviews_count__gte=min_reviews()
+    ).order_by(rating_expression().desc(), '-reviews_count', 'id')
+
+
+def new_entry(board, title):
+    field, value = board
+    return LeaderboardEntry(
+        title=title, rating=title.rating, reviews_count=title.reviews_count,
+        **{field: value}
+    )
+
+
+def add_entries(board, titles):
+    # a title another worker has just put on the board stays as it is
+    LeaderboardEntry.objects.bulk_create(
+        (new_entry(board, title) for title in titles), ignore_conflicts=True
+    )
+
+
+def board_of(row):
+    """Board of an entry from its BOARD_FIELDS values."""
+    return next((field, value) for field, value in zip(BOARD_FIELDS, row)
+                if value is not None)
+
+
+def boards_of(title):
+    """Boards the title belongs to by its genres, category and year."""
+    boards = {('year', title.year)}
+    if title.category_id is not None:
+        boards.add(('category_id', title.category_id))
+    boards.update(
+        ('genre_id', pk) for pk in Genre.objects.filter(
+            titles=title.pk
+        ).values_list('pk', flat=True)
+    )
+    return boards
+
+
+def boards_with(title_id):
+    """Boards the title is on."""
+    return {
+        board_of(row) for row in LeaderboardEntry.objects.filter(
+            title_id=title_id
+        ).values_list(*BOARD_FIELDS)
+    }
+
+
+def refill(board):
+    """Fills a short board and swaps its last title for the best
+    title off it, when that one ranks higher."""
+    ranked = entries(board).order_by(*RANKING)
+    members = ranked.values('title_id')
+    missing = settings.LEADERBOARD_SIZE - ranked.count()
+    if missing > 0:
+        add_entries(
+            board, candidates(board).exclude(pk__in=members)[:missing]
+        )
+        return
+    best = candidates(board).exclude(pk__in=members).first()
+    if best is None:
+        return
+    last = ranked.reverse().first()
+    if rank(best.rating, best.reviews_count, best.pk) < rank(
+            last.rating, last.reviews_count, last.title_id):
+        last.delete()
+        add_entries(board, (best,))
+
+
+def update_board(board, title, belongs):
+    """Puts the title where it belongs on the board."""
+    board_entries = entries(board)
+    if belongs:
+        if not board_entries.filter(title=title).update(
+                rating=title.rating, reviews_count=title.reviews_count):
+            add_entries(board, (title,))
+    elif not board_entries.filter(title=title).delete()[0]:
+        return
+    ranked = board_entries.order_by(*RANKING)
+    extra = list(ranked.values_list('pk', flat=True)[
+        settings.LEADERBOARD_SIZE:
+    ])
+    if extra:
+        # the title pushed the last one off the board
+        board_entries.filter(pk__in=extra).delete()
+        return
+    last = ranked.reverse().values_list('title_id', flat=True).first()
+    if not belongs or last == title.pk:
+        # the title fell, a title off the board may rank higher now
+        refill(board)
+
+
+def update_leaderboards(title_id):
+    title = Title.objects.filter(pk=title_id).first()
+    if title is None:
+        # its places are empty now, see fill_empty_places
+        return
+    boards = set()
+    if title.reviews_count >= min_reviews():
+        boards = boards_of(title)
+    for board in boards | boards_with(title_id):
+        update_board(board, title, board in boards)
+
+
+def fill_empty_places():
+    """Drops the places of deleted titles, the best titles off their
+    boards take them."""
+    empty = list(
+        LeaderboardEntry.objects.select_for_update(skip_locked=True)
+        .filter(title=None).values_list('pk', *BOARD_FIELDS)
+    )
+    LeaderboardEntry.objects.filter(
+        pk__in=[pk for pk, *_ in empty]
+    ).delete()
+    for board in {board_of(row) for _, *row in empty}:
+        refill(board)
+
+
+def update_pending(batch_size):
+    """Moves up to batch_size flagged titles on their boards and fills
+    the empty places, returns the number of titles. The titles stay
+    locked until the boards are updated, a review written meanwhile
+    waits and flags its title again."""
+    with transaction.atomic():
+        title_ids = list(
+            Title.objects.select_for_update(skip_locked=True)
+            .filter(leaderboard_pending=True).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        Title.objects.filter(pk__in=title_ids).update(
+            leaderboard_pending=False
+        )
+        fill_empty_places()
+        for title_id in title_ids:
+            update_leaderboards(title_id)
+    return len(title_ids)
+
+
+def all_boards():
+    """Every board with a title on it or a title that belongs on it."""
+    boards = {
+        ('genre_id', pk) for pk in Genre.objects.values_list('pk', flat=True)
+    }
+    boards.update(
+        ('category_id', pk)
+        for pk in Category.objects.values_list('pk', flat=True)
+    )
+    boards.update(
+        ('year', year) for year in Title.objects.order_by().filter(
+            reviews_count__gte=min_reviews()
+        ).values_list('year', flat=True).distinct()
+    )
+    boards.update(
+        ('year', year) for year in LeaderboardEntry.objects.order_by()
+        .exclude(year=None).values_list('year', flat=True).distinct()
+    )
+    return boards
+
+
+def rebuild_board(board, check=False):
+    """Builds the board from the titles, returns whether it differed."""
+    titles = list(candidates(board)[:settings.LEADERBOARD_SIZE])
+    expected = [
+        (title.pk, title.rating, title.reviews_count) for title in titles
+    ]
+    actual = list(places(board).order_by(*RANKING).values_list(
+        'title_id', 'rating', 'reviews_count'
+    ))
+    if expected == actual:
+        return False
+    if not check:
+        places(board).delete()
+        add_entries(board, titles)
+    return True
@@ -0,0 +1,69 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.export import EXPORTS, LINES, TIMESTAMPED, parse_since, stream
+
+summary_message = '{file}: {size} bytes in {elapsed:.2f}s'
+
+
+class Command(BaseCommand):
+    """Exports the DataBase into the csv files load_data reads, or NDJSON.
+    Rows are streamed with server-side cursors, memory use stays flat
+    no matter how large the tables are."""
+
+    help = 'Выгружает БД в csv файлы в формате команды load_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default='.',
+            help='Directory the files are written to'
+        )
+        parser.add_argument(
+            '--format',
+            choices=tuple(LINES),
+            default='csv'
+        )
+        parser.add_argument(
+            '--dataset',
+            action='append',
+            choices=tuple(EXPORTS),
+            help='Export only this file, can be repeated'
+        )
+        parser.add_argument(
+            '--since',
+            help='Only reviews and comments published at or after the date'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched from the cursor at once'
+        )
+
+    def handle(self, *args, **options):
+        since = options['since']
+        datasets = options['dataset']
+        if since is not None:
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+            datasets = datasets or TIMESTAMPED
+            for name in datasets:
+                if name not in TIMESTAMPED:
+                    raise CommandError(f'{name} has no publication date')
+        os.makedirs(options['path'], exist_ok=True)
+        for name in datasets or EXPORTS:
+            file = f'{name}.{options["format"]}'
+            started = time.monotonic()
+            with open(os.path.join(options['path'], file), 'w',
+                      encoding='utf8', newline='') as output:
+                for chunk in stream(name, options['format'], since=since,
+                                    chunk_size=options['chunk_size']):
+                    output.write(chunk)
+                size = output.tell()
+            self.stdout.write(summary_message.format(
+                file=file, size=size, elapsed=time.monotonic() - started
+            ))
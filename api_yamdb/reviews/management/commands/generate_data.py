@@ -0,0 +1,115 @@
+import random
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+WORDS = (
+    'фильм книга музыка сюжет герой финал история актёр режиссёр роман '
+    'песня альбом сцена диалог атмосфера драма комедия трагедия '
+    'story plot hero music scene ending classic sequel novel album'
+).split()
+
+progress_message = '{model}: {rows} rows in {elapsed:.1f}s'
+success_message = 'Generated {reviews} reviews for {titles} titles'
+
+
+class Command(BaseCommand):
+    """Fills an empty DataBase with synthetic data for benchmarks.
+    Everything is written with bulk_create, a million reviews
+    take a few minutes on SQLite."""
+
+    help = 'Заполняет пустую БД случайными данными для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument(
+            '--comments', type=int, default=1,
+            help='Comments per review'
+        )
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def bulk(self, model, objects):
+        started = time.monotonic()
+        rows = 0
+        batch = []
+        for instance in objects:
+            batch.append(instance)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch)
+                rows += len(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+        rows += len(batch)
+        self.stdout.write(progress_message.format(
+            model=model._meta.model_name, rows=rows,
+            elapsed=time.monotonic() - started
+        ))
+
+    def handle(self, *args, **options):
+        if Title.objects.exists() or Review.objects.exists():
+            raise CommandError('The DataBase is not empty')
+        titles, users = options['titles'], options['users']
+        reviews = options['reviews']
+        if reviews > titles * users:
+            raise CommandError('Every user can review a title only once, '
+                               'add titles or users')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            self.bulk(Category, (
+                Category(id=pk, name=f'Категория {pk}', slug=f'category-{pk}')
+                for pk in range(1, options['categories'] + 1)
+            ))
+            self.bulk(Genre, (
+                Genre(id=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+                for pk in range(1, options['genres'] + 1)
+            ))
+            self.bulk(User, (
+                User(id=pk, username=f'user{pk}',
+                     email=f'user{pk}@yamdb.fake', bio=self.text(5))
+                for pk in range(1, users + 1)
+            ))
+            self.bulk(Title, (
+                Title(id=pk, name=self.text(3), year=self.random.randint(
+                    1900, 2020), description=self.text(30),
+                    category_id=self.random.randint(1, options['categories']))
+                for pk in range(1, titles + 1)
+            ))
+            self.bulk(Title.genre.through, (
+                Title.genre.through(title_id=title, genre_id=genre)
+                for title in range(1, titles + 1)
+                for genre in self.random.sample(
+                    range(1, options['genres'] + 1),
+                    min(2, options['genres']))
+            ))
+            # reviews go round-robin over titles, one round per author,
+            # so (title, author) pairs stay unique
+            self.bulk(Review, (
+                Review(id=pk + 1, title_id=pk % titles + 1,
+                       author_id=pk // titles + 1, text=self.text(40),
+                       score=self.random.randint(1, 10))
+                for pk in range(reviews)
+            ))
+            self.bulk(Comment, (
+                Comment(review_id=self.random.randint(1, reviews),
+                        author_id=self.random.randint(1, users),
+                        text=self.text(15))
+                for _ in range(reviews * options['comments'])
+            ))
+        call_command('rebuild_ratings', verbosity=0)
+        call_command('rebuild_title_counts', verbosity=0)
+        call_command('rebuild_leaderboards', verbosity=0)
+        self.stdout.write(
+            success_message.format(reviews=reviews, titles=titles)
+        )
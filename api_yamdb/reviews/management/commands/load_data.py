@@ -1,50 +1,147 @@
+import io
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from csv import DictReader
+from itertools import islice
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
-error_message = 'Error'
-success_message = 'Success'
+DATA_DIR = os.path.join(settings.BASE_DIR, 'api', 'static', 'data')
+
 start_message = 'Importing data'
+success_message = 'Success'
+dry_run_message = 'Dry run: data is valid, nothing was written'
+skip_message = '{file}: table is not empty, skipped'
+progress_message = '{file}: {rows} rows ({rate:.0f} rows/s)'
+rejected_message = '{file}, row {row}: {error}'
+summary_message = ('{file}: {rows} imported, {rejected} rejected '
+                   'in {elapsed:.2f}s ({rate:.0f} rows/s)')
+
+
+class RejectedRow(ValueError):
+    pass
+
+
+def copy_value(value):
+    if value is None:
+        return ''
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+
+def field_value(instance, field):
+    """Value of a field for COPY, auto_now fields get the current time
+    like bulk_create gives them."""
+    if getattr(field, 'auto_now', False):
+        return field.pre_save(instance, True)
+    return getattr(instance, field.attname)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """bulk_create writes the given values of auto_now_add fields,
+    the csv dates, like COPY does."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
 
 
 class Command(BaseCommand):
-    """Imports data from csv files into SQLite3 DataBase."""
+    """Imports data from csv files into the DataBase.
+    Files are streamed in batches, foreign keys are checked against
+    in-memory id sets and every batch is written with a single
+    bulk_create (COPY on PostgreSQL), one transaction per file."""
 
     help = 'Команда для создания БД на основе имеющихся csv файлов'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=DATA_DIR,
+            help='Directory with the csv files'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows read and written at once'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only validate the files, do not write anything'
+        )
+
+    def new_id(self, model, value):
+        pk = self.to_int(value, 'id')
+        if pk in self.known_ids[model]:
+            raise RejectedRow(f'duplicate {model.__name__} id {pk}')
+        return pk
+
+    def reference(self, model, value, required=True):
+        if not value and not required:
+            return None
+        pk = self.to_int(value, f'{model.__name__} id')
+        if pk not in self.known_ids[model]:
+            raise RejectedRow(f'unknown {model.__name__} id {pk}')
+        return pk
+
+    def to_int(self, value, name):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise RejectedRow(f'invalid {name} {value!r}')
+
     def genre_create(self, row):
-        Genre.objects.create(
-            id=row['id'],
+        return Genre(
+            id=self.new_id(Genre, row['id']),
             name=row['name'],
             slug=row['slug']
         )
 
     def category_create(self, row):
-        Category.objects.create(
-            id=row['id'],
+        return Category(
+            id=self.new_id(Category, row['id']),
             name=row['name'],
             slug=row['slug']
         )
 
     def title_create(self, row):
-        Title.objects.create(
-            id=row['id'],
+        return Title(
+            id=self.new_id(Title, row['id']),
             name=row['name'],
             year=row['year'],
-            category=Category.objects.get(id=row['category'])
+            description=row.get('description') or '',
+            category_id=self.reference(
+                Category, row['category'], required=False
+            )
         )
 
     def genre_title_create(self, row):
-        Title.genres.through.objects.create(
-            id=row['id'],
-            title_id=row['title_id'],
-            genre_id=row['genre_id']
+        return Title.genre.through(
+            id=self.new_id(Title.genre.through, row['id']),
+            title_id=self.reference(Title, row['title_id']),
+            genre_id=self.reference(Genre, row['genre_id'])
         )
 
     def user_create(self, row):
-        User.objects.create(
-            id=row['id'],
+        return User(
+            id=self.new_id(User, row['id']),
             username=row['username'],
             email=row['email'],
             role=row['role'],
@@ -53,45 +150,147 @@ class Command(BaseCommand):
             last_name=row['last_name']
         )
 
-    def comment_create(self, row):
-        Comment.objects.create(
-            id=row['id'],
-            review_id=row['review_id'],
+    def review_create(self, row):
+        return Review(
+            id=self.new_id(Review, row['id']),
+            title_id=self.reference(Title, row['title_id']),
             text=row['text'],
-            author=User.objects.get(id=row['author']),
-            pub_date=['pub_date']
+            author_id=self.reference(User, row['author']),
+            score=row['score'],
+            pub_date=row['pub_date']
         )
 
-    def review_create(self, row):
-        title, _ = Title.objects.get_or_create(id=row['title_id'])
-        Review.objects.create(
-            id=row['id'],
-            title_id=title.pk,
+    def comment_create(self, row):
+        return Comment(
+            id=self.new_id(Comment, row['id']),
+            review_id=self.reference(Review, row['review_id']),
             text=row['text'],
-            author=User.objects.get(id=row['author']),
-            score=row['score'],
+            author_id=self.reference(User, row['author']),
             pub_date=row['pub_date']
         )
 
     ACTIONS = [
-        (genre_create, Genre, 'genre.csv'),
-        (category_create, Category, 'category.csv'),
-        (title_create, Title, 'titles.csv'),
-        (genre_title_create, Title.genres.through, 'genre_title.csv'),
-        (user_create, User, 'users.csv'),
-        (review_create, Review, 'review.csv'),
-        (comment_create, Comment, 'comments.csv'),
+        (genre_create, Genre, 'genre.csv', (('name',), ('slug',))),
+        (category_create, Category, 'category.csv', (('name',), ('slug',))),
+        (title_create, Title, 'titles.csv', ()),
+        (genre_title_create, Title.genre.through, 'genre_title.csv',
+         (('title_id', 'genre_id'),)),
+        (user_create, User, 'users.csv', (('username',), ('email',))),
+        (review_create, Review, 'review.csv', (('title_id', 'author_id'),)),
+        (comment_create, Comment, 'comments.csv', ()),
     ]
 
+    def check_row(self, instance, unique_fields):
+        """Runs field validators and unique checks without any queries:
+        relations were already checked against known ids."""
+        exclude = ['id', 'password'] + [
+            field.name for field in instance._meta.fields
+            if field.is_relation
+        ]
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as error:
+            raise RejectedRow('; '.join(
+                f'{name}: {" ".join(messages)}'
+                for name, messages in error.message_dict.items()
+            ))
+        for fields in unique_fields:
+            key = tuple(getattr(instance, name) for name in fields)
+            if key in self.unique_values[fields, instance._meta.model]:
+                raise RejectedRow(f'duplicate {", ".join(fields)} {key}')
+        for fields in unique_fields:
+            self.unique_values[fields, instance._meta.model].add(
+                tuple(getattr(instance, name) for name in fields)
+            )
+        self.known_ids[instance._meta.model].add(instance.pk)
+
+    def write_batch(self, model, batch):
+        if self.dry_run or not batch:
+            return
+        if connection.vendor != 'postgresql':
+            with keep_auto_now_add(model):
+                model.objects.bulk_create(batch)
+            return
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        for instance in batch:
+            buffer.write(','.join(
+                copy_value(field.get_db_prep_save(
+                    field_value(instance, field), connection
+                )) for field in fields
+            ))
+            buffer.write('\n')
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} '
+                f'({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+
+    def import_file(self, func, model, file, unique_fields):
+        started = time.monotonic()
+        imported = rejected = 0
+        with open(os.path.join(self.path, file), encoding='utf8') as csv:
+            rows = enumerate(DictReader(csv), start=1)
+            chunk = list(islice(rows, self.batch_size))
+            while chunk:
+                batch = []
+                for number, row in chunk:
+                    try:
+                        instance = func(self, row)
+                        self.check_row(instance, unique_fields)
+                    except RejectedRow as error:
+                        rejected += 1
+                        self.stderr.write(rejected_message.format(
+                            file=file, row=number, error=error
+                        ))
+                        continue
+                    batch.append(instance)
+                self.write_batch(model, batch)
+                imported += len(batch)
+                if self.verbosity:
+                    self.stdout.write(progress_message.format(
+                        file=file, rows=imported,
+                        rate=imported / (time.monotonic() - started)
+                    ))
+                chunk = list(islice(rows, self.batch_size))
+        if not self.dry_run and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                        no_style(), [model]):
+                    cursor.execute(sql)
+        elapsed = time.monotonic() - started
+        self.stdout.write(summary_message.format(
+            file=file, rows=imported, rejected=rejected, elapsed=elapsed,
+            rate=(imported + rejected) / elapsed if elapsed else 0
+        ))
+
     def handle(self, *args, **options):
-        print(start_message)
-        for func, model, file in self.ACTIONS:
+        self.path = options['path']
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.known_ids = defaultdict(set)
+        self.unique_values = defaultdict(set)
+        self.stdout.write(start_message)
+        for func, model, file, unique_fields in self.ACTIONS:
             if model.objects.exists():
-                print(error_message)
-            else:
-                for row in DictReader(
-                    open('static/data/' + file, encoding='utf8')
-                ):
-                    func(row)
-
-        print(success_message)
+                self.stdout.write(skip_message.format(file=file))
+                self.known_ids[model].update(
+                    model.objects.values_list('pk', flat=True).iterator()
+                )
+                continue
+            with transaction.atomic():
+                self.import_file(func, model, file, unique_fields)
+        if self.dry_run:
+            self.stdout.write(dry_run_message)
+            return
+        # bulk writes bypass the signals, rebuild the aggregates
+        call_command('rebuild_ratings', stdout=self.stdout, verbosity=0)
+        call_command('rebuild_title_counts', stdout=self.stdout, verbosity=0)
+        call_command('rebuild_leaderboards', stdout=self.stdout, verbosity=0)
+        self.stdout.write(success_message)
@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reviews.models import Tombstone
+
+success_message = 'Deleted {deleted} tombstones older than {days} days'
+
+
+class Command(BaseCommand):
+    """Deletes the tombstones older than CHANGES_RETENTION_DAYS,
+    the change feed answers older tokens with 410 Gone."""
+
+    help = 'Удаляет устаревшие записи об удалённых объектах'
+
+    def handle(self, *args, **options):
+        days = settings.CHANGES_RETENTION_DAYS
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        if options['verbosity']:
+            self.stdout.write(success_message.format(deleted=deleted,
+                                                     days=days))
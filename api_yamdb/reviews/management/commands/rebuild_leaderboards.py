@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews import leaderboards
+
+drift_message = 'Board {field}={value} drifted'
+success_message = 'Checked {total} leaderboards, {drifted} drifted'
+
+
+class Command(BaseCommand):
+    """Rebuilds the leaderboards of genres, categories and years
+    from the stored title ratings."""
+
+    help = ('Пересчитывает рейтинги лучших произведений жанров, категорий '
+            'и лет, с --check только сообщает о расхождениях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted leaderboards, do not fix them'
+        )
+
+    def handle(self, *args, **options):
+        total = drifted = 0
+        with transaction.atomic():
+            for field, value in sorted(leaderboards.all_boards()):
+                total += 1
+                if not leaderboards.rebuild_board((field, value),
+                                                  check=options['check']):
+                    continue
+                drifted += 1
+                if options['verbosity']:
+                    self.stdout.write(drift_message.format(field=field,
+                                                           value=value))
+        message = success_message.format(total=total, drifted=drifted)
+        if options['check'] and drifted:
+            raise CommandError(message)
+        if options['verbosity']:
+            self.stdout.write(message)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from reviews.models import SCORES, Title
+
+drift_message = 'Title {pk}: stored {stored}, actual {actual}'
+success_message = 'Checked {total} titles, {drifted} drifted'
+
+
+class Command(BaseCommand):
+    """Rebuilds stored title rating aggregates and score histograms
+    from the reviews table."""
+
+    help = ('Пересчитывает количество отзывов, сумму и гистограмму оценок '
+            'произведений, с --check только сообщает о расхождениях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted titles, do not fix them'
+        )
+
+    def handle(self, *args, **options):
+        buckets = [f'score_{score}' for score in SCORES]
+        actual = (
+            Title.objects.order_by()
+            .annotate(
+                actual_count=Count('reviews'),
+                actual_sum=Sum('reviews__score'),
+                **{
+                    f'actual_{bucket}': Count(
+                        'reviews', filter=Q(reviews__score=score)
+                    )
+                    for score, bucket in zip(SCORES, buckets)
+                }
+            )
+            .values_list(
+                'pk', 'reviews_count', 'score_sum', *buckets,
+                'actual_count', 'actual_sum',
+                *(f'actual_{bucket}' for bucket in buckets)
+            )
+        )
+        size = len(buckets) + 2
+        total = drifted = 0
+        with transaction.atomic():
+            for pk, *row in actual:
+                total += 1
+                stored, actual_row = row[:size], row[size:]
+                actual_row[1] = actual_row[1] or 0
+                if stored == actual_row:
+                    continue
+                drifted += 1
+                if options['verbosity']:
+                    self.stdout.write(drift_message.format(
+                        pk=pk, stored=tuple(stored), actual=tuple(actual_row)
+                    ))
+                if not options['check']:
+                    Title.objects.filter(pk=pk).update(**dict(zip(
+                        ('reviews_count', 'score_sum', *buckets), actual_row
+                    )))
+        message = success_message.format(total=total, drifted=drifted)
+        if options['check'] and drifted:
+            raise CommandError(message)
+        if options['verbosity']:
+            self.stdout.write(message)
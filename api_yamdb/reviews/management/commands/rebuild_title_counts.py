@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from reviews.models import Category, Genre
+
+drift_message = '{model} {pk}: stored {stored}, actual {actual}'
+success_message = 'Checked {total} genres and categories, {drifted} drifted'
+
+
+class Command(BaseCommand):
+    """Rebuilds stored title counts of genres and categories
+    from the titles table."""
+
+    help = ('Пересчитывает количество произведений жанров и категорий, '
+            'с --check только сообщает о расхождениях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted counts, do not fix them'
+        )
+
+    def handle(self, *args, **options):
+        total = drifted = 0
+        with transaction.atomic():
+            for model in (Genre, Category):
+                actual = (
+                    model.objects.order_by()
+                    .annotate(actual=Count('titles'))
+                    .values_list('pk', 'titles_count', 'actual')
+                )
+                for pk, stored, count in actual:
+                    total += 1
+                    if stored == count:
+                        continue
+                    drifted += 1
+                    if options['verbosity']:
+                        self.stdout.write(drift_message.format(
+                            model=model.__name__, pk=pk, stored=stored,
+                            actual=count
+                        ))
+                    if not options['check']:
+                        model.objects.filter(pk=pk).update(titles_count=count)
+        message = success_message.format(total=total, drifted=drifted)
+        if options['check'] and drifted:
+            raise CommandError(message)
+        if options['verbosity']:
+            self.stdout.write(message)
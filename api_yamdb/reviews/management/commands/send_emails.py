@@ -0,0 +1,109 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+
+batch_message = 'Sent {sent}, failed {failed}'
+
+
+class Command(BaseCommand):
+    """Sends queued emails from the OutgoingEmail outbox.
+    Every batch reuses one mail backend connection, failed emails
+    are retried with exponential backoff up to --max-attempts times."""
+
+    help = 'Отправляет письма из очереди исходящих писем'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Emails sent over one connection'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=8,
+            help='Give up on an email after this many failures'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send everything that is due and exit'
+        )
+
+    def postpone(self, email, now, error):
+        email.attempts += 1
+        email.next_attempt = now + timedelta(
+            seconds=settings.EMAIL_RETRY_DELAY * 2 ** (email.attempts - 1)
+        )
+        email.last_error = str(error)
+
+    def send_emails(self, emails, connection, now):
+        sent = failed = 0
+        for email in emails:
+            try:
+                EmailMessage(
+                    subject=email.subject,
+                    body=email.message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=(email.recipient,),
+                    connection=connection
+                ).send()
+            except Exception as error:
+                failed += 1
+                self.postpone(email, now, error)
+            else:
+                sent += 1
+                email.sent = now
+        return sent, failed
+
+    def send_batch(self, batch_size, max_attempts):
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(sent__isnull=True, next_attempt__lte=now,
+                        attempts__lt=max_attempts)
+                .order_by('next_attempt')[:batch_size]
+            )
+            if not emails:
+                return 0
+            connection = get_connection(fail_silently=False)
+            try:
+                connection.open()
+            except Exception as error:
+                for email in emails:
+                    self.postpone(email, now, error)
+                sent, failed = 0, len(emails)
+            else:
+                sent, failed = self.send_emails(emails, connection, now)
+            finally:
+                connection.close()
+            OutgoingEmail.objects.bulk_update(
+                emails, ('attempts', 'next_attempt', 'sent', 'last_error')
+            )
+        self.stdout.write(batch_message.format(sent=sent, failed=failed))
+        return len(emails)
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.send_batch(
+                options['batch_size'], options['max_attempts']
+            )
+            if processed:
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
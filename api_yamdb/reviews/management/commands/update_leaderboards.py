@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews import leaderboards
+
+batch_message = 'Updated the boards of {titles} titles'
+
+
+class Command(BaseCommand):
+    """Moves the titles flagged by review and title writes on their
+    leaderboards and refills the places of deleted titles, batch by
+    batch. Several workers share the flagged titles without overlap."""
+
+    help = ('Обновляет рейтинги лучших произведений после изменений '
+            'отзывов и произведений')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Titles updated in one transaction'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds to wait when no title is flagged'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Update every flagged title and exit'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = leaderboards.update_pending(options['batch_size'])
+            if processed:
+                if options['verbosity']:
+                    self.stdout.write(batch_message.format(titles=processed))
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+from django.db import migrations
+from reviews import search
+
+
+def install_search_index(apps, schema_editor):
+    search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            install_search_index, migrations.RunPython.noop
+        ),
+    ]
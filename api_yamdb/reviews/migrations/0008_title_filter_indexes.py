@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-17 04:15
+
+from django.db import migrations, models
+import django.db.models.expressions
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'id'], name='title_year_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name', 'id'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('score_sum', models.FloatField()), '/', django.db.models.functions.comparison.NullIf('reviews_count', 0)), django.db.models.expressions.F('id'), name='title_rating_idx'),
+        ),
+    ]
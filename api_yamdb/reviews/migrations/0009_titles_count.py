@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-17 04:24
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_titles_count(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    counts = {
+        apps.get_model('reviews', 'Category'): (
+            Title.objects.order_by().exclude(category=None)
+            .values_list('category').annotate(count=Count('id'))
+        ),
+        apps.get_model('reviews', 'Genre'): (
+            Title.genre.through.objects.order_by().values_list('genre')
+            .annotate(count=Count('id'))
+        ),
+    }
+    for model, rows in counts.items():
+        for pk, count in rows.iterator():
+            model.objects.filter(pk=pk).update(titles_count=count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='titles_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество произведений'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='titles_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество произведений'),
+        ),
+        migrations.RunPython(fill_titles_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-17 05:00
+
+import django.db.models.deletion
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_leaderboards'),
+    ]
+
+    operations = [
+        # SQLite rebuilds the table to add a column and cannot copy
+        # an expression index, it is dropped and created again.
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_rating_idx',
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='leaderboard_pending',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ждёт обновления рейтингов'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('score_sum', models.FloatField()), '/', django.db.models.functions.comparison.NullIf('reviews_count', 0)), django.db.models.expressions.F('id'), name='title_rating_idx'),
+        ),
+        migrations.AlterField(
+            model_name='leaderboardentry',
+            name='title',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(leaderboard_pending=True), fields=['id'], name='title_leaderboard_pending_idx'),
+        ),
+    ]
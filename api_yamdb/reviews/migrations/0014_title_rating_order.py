@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-17 05:12
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_leaderboard_worker'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(django.db.models.functions.comparison.Coalesce(django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast('score_sum', models.FloatField()), '/', django.db.models.functions.comparison.NullIf('reviews_count', 0)), django.db.models.expressions.Value(0.0)), django.db.models.expressions.F('id'), name='title_rating_idx'),
+        ),
+    ]
@@ -1,8 +1,28 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from reviews.validators import validate_year
 
+SCORES = range(1, 11)
+
+
+def rating_expression():
+    """Title.rating in SQL, NULL for titles without reviews."""
+    return (
+        Cast('score_sum', models.FloatField())
+        / NullIf('reviews_count', 0)
+    )
+
+
+def rating_order_expression():
+    """Title.rating in SQL, 0 for titles without reviews, below every
+    score. Queries must use it as is to be served by title_rating_idx,
+    without NULLs the index is read the same in either direction on
+    every backend."""
+    return Coalesce(rating_expression(), models.Value(0.0))
+
 
 class User(AbstractUser):
     """
@@ -61,7 +81,11 @@ class Category(models.Model):
     Category model. Supports all CRUD functions.
     Model fields:
         name: category's name, type - string, required field,
-        slug: category's slug, type - string, required field.
+        slug: category's slug, type - string, required field,
+        titles_count: number of titles of the category, type - int,
+        maintained automatically,
+        updated_at: time of the last change, type - datetime field,
+        maintained automatically.
     """
     name = models.CharField(
         verbose_name='Название',
@@ -73,9 +97,22 @@ class Category(models.Model):
         max_length=50,
         unique=True
     )
+    titles_count = models.PositiveIntegerField(
+        verbose_name='Количество произведений',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('updated_at', 'id'),
+                         name='category_updated_idx'),
+        ]
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
 
@@ -88,7 +125,11 @@ class Genre(models.Model):
     Genre model. Supports all CRUD functions.
     Model fields:
         name: genre's name, type - string, required field,
-        slug: genre's slug, type - string, required field.
+        slug: genre's slug, type - string, required field,
+        titles_count: number of titles of the genre, type - int,
+        maintained automatically,
+        updated_at: time of the last change, type - datetime field,
+        maintained automatically.
     """
     name = models.CharField(
         verbose_name='Название',
@@ -100,9 +141,22 @@ class Genre(models.Model):
         max_length=50,
         unique=True
     )
+    titles_count = models.PositiveIntegerField(
+        verbose_name='Количество произведений',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('updated_at', 'id'),
+                         name='genre_updated_idx'),
+        ]
         verbose_name = 'Жанр'
         verbose_name_plural = 'Жанры'
 
@@ -119,7 +173,18 @@ class Title(models.Model):
         description: title's description, type - string, optional field,
         genre: title's genre, type - Genre class instance, required field,
         category: title's category, type - Category class instance, optional
-        field.
+        field,
+        reviews_count: number of title's reviews, type - int, maintained
+        automatically,
+        score_sum: sum of title's review scores, type - int, maintained
+        automatically,
+        score_1 ... score_10: number of title's reviews with that score,
+        type - int, maintained automatically,
+        updated_at: time of the last change of the title, its genres or
+        its rating, type - datetime field, maintained automatically,
+        leaderboard_pending: whether the boards of the title wait for
+        the update_leaderboards worker, type - bool, maintained
+        automatically.
     """
     name = models.CharField(
         verbose_name='Название',
@@ -143,15 +208,112 @@ class Title(models.Model):
         verbose_name='Категория',
         null=True
     )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    score_1 = models.PositiveIntegerField(
+        verbose_name='Оценок 1',
+        default=0,
+        editable=False
+    )
+    score_2 = models.PositiveIntegerField(
+        verbose_name='Оценок 2',
+        default=0,
+        editable=False
+    )
+    score_3 = models.PositiveIntegerField(
+        verbose_name='Оценок 3',
+        default=0,
+        editable=False
+    )
+    score_4 = models.PositiveIntegerField(
+        verbose_name='Оценок 4',
+        default=0,
+        editable=False
+    )
+    score_5 = models.PositiveIntegerField(
+        verbose_name='Оценок 5',
+        default=0,
+        editable=False
+    )
+    score_6 = models.PositiveIntegerField(
+        verbose_name='Оценок 6',
+        default=0,
+        editable=False
+    )
+    score_7 = models.PositiveIntegerField(
+        verbose_name='Оценок 7',
+        default=0,
+        editable=False
+    )
+    score_8 = models.PositiveIntegerField(
+        verbose_name='Оценок 8',
+        default=0,
+        editable=False
+    )
+    score_9 = models.PositiveIntegerField(
+        verbose_name='Оценок 9',
+        default=0,
+        editable=False
+    )
+    score_10 = models.PositiveIntegerField(
+        verbose_name='Оценок 10',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+    leaderboard_pending = models.BooleanField(
+        verbose_name='Ждёт обновления рейтингов',
+        default=False,
+        editable=False
+    )
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            models.Index(fields=('year', 'id'), name='title_year_id_idx'),
+            models.Index(
+                fields=('category', 'name', 'id'),
+                name='title_category_name_idx'
+            ),
+            models.Index(
+                rating_order_expression(), models.F('id'),
+                name='title_rating_idx'
+            ),
+            models.Index(fields=('updated_at', 'id'),
+                         name='title_updated_idx'),
+            models.Index(fields=('id',),
+                         name='title_leaderboard_pending_idx',
+                         condition=models.Q(leaderboard_pending=True)),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.reviews_count:
+            return None
+        return self.score_sum / self.reviews_count
+
+    @property
+    def histogram(self):
+        """Number of reviews by score, from the lowest score."""
+        return [getattr(self, f'score_{score}') for score in SCORES]
+
 
 class Review(models.Model):
     """
@@ -163,6 +325,8 @@ class Review(models.Model):
         author: review's author, type - User class instnce, required field,
         score: review's score, type - int, required field,
         pub_date: review's publication date, type - datetime field,
+        automatically fullfield,
+        updated_at: time of the last change, type - datetime field,
         automatically fullfield.
     """
     title = models.ForeignKey(
@@ -189,6 +353,10 @@ class Review(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         ordering = ('-pub_date',)
@@ -198,11 +366,25 @@ class Review(models.Model):
                 name='unique_review'
             )
         ]
+        indexes = [
+            models.Index(fields=('title', '-pub_date', '-id'),
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=('updated_at', 'id'),
+                         name='review_updated_idx'),
+            models.Index(fields=('title', 'updated_at'),
+                         name='review_title_updated_idx'),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
     def __str__(self):
-        return self.title
+        return self.text
+
+    def save(self, *args, **kwargs):
+        # Title rating aggregates are updated by the post_save handler,
+        # keep them in the same transaction as the review itself.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Comment(models.Model):
@@ -214,6 +396,8 @@ class Comment(models.Model):
         text:  comment's text, type - string, required field,
         author: comment's author, type - User class instnce, required field,
         pub_date: comment's publication date, type - datetime field,
+        automatically fullfield,
+        updated_at: time of the last change, type - datetime field,
         automatically fullfield.
     """
     review = models.ForeignKey(
@@ -233,11 +417,166 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=('review', '-pub_date', '-id'),
+                         name='comment_review_pub_date_idx'),
+            models.Index(fields=('review', 'updated_at'),
+                         name='comment_review_updated_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Place of a title on the leaderboard of a genre, a category or a year,
+    maintained by reviews.leaderboards.
+    Model fields:
+        title: the title, type - Title class instance, empty for the place
+        of a deleted title until the board is refilled,
+        genre: genre of the board, type - Genre class instance, optional
+        field,
+        category: category of the board, type - Category class instance,
+        optional field,
+        year: year of the board, type - int, optional field,
+        rating: title's rating, type - float, required field,
+        reviews_count: number of title's reviews, type - int,
+        required field.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.SET_NULL,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение',
+        null=True
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Жанр',
+        null=True
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Категория',
+        null=True
+    )
+    year = models.IntegerField(verbose_name='Год выпуска', null=True)
+    rating = models.FloatField(verbose_name='Рейтинг')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    class Meta:
+        ordering = ('-rating', '-reviews_count', 'title')
+        constraints = [
+            models.UniqueConstraint(fields=(board, 'title'),
+                                    name=f'unique_{board}_leaderboard_entry')
+            for board in ('genre', 'category', 'year')
+        ]
+        indexes = [
+            models.Index(
+                fields=(board, '-rating', '-reviews_count', 'title'),
+                name=f'leaderboard_{board}_idx'
+            )
+            for board in ('genre', 'category', 'year')
+        ]
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+
+    def __str__(self):
+        return f'{self.title_id} {self.rating}'
+
+
+class Tombstone(models.Model):
+    """
+    Trace of a deleted catalog object, read by the change feed.
+    Model fields:
+        model: name of the deleted object's model, type - string,
+        required field,
+        key: the slug of a deleted genre or category or the id of
+        a deleted title or review, type - string, required field,
+        deleted_at: time of the deletion, type - datetime field,
+        automatically fullfield.
+    """
+    model = models.CharField(verbose_name='Модель', max_length=32)
+    key = models.CharField(verbose_name='Ключ', max_length=50)
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('deleted_at', 'id')
+        indexes = [
+            models.Index(fields=('deleted_at', 'id'),
+                         name='tombstone_deleted_idx'),
+        ]
+        verbose_name = 'Удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+
+    def __str__(self):
+        return f'{self.model} {self.key}'
+
+
+class OutgoingEmail(models.Model):
+    """
+    Outbox of emails waiting to be sent by the send_emails worker.
+    Model fields:
+        subject: email's subject, type - string, required field,
+        message: email's body, type - string, required field,
+        recipient: recipient's address, type - string, required field,
+        created: time the email was queued, type - datetime field,
+        automatically fullfield,
+        attempts: number of failed sending attempts, type - int,
+        next_attempt: time of the next sending attempt, type - datetime field,
+        sent: time the email was sent, type - datetime field, empty while
+        the email is pending,
+        last_error: error of the last failed attempt, type - string.
+    """
+    subject = models.CharField(verbose_name='Тема', max_length=256)
+    message = models.TextField(verbose_name='Текст')
+    recipient = models.EmailField(verbose_name='Получатель')
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попытки отправки',
+        default=0
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    sent = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(verbose_name='Ошибка', blank=True)
+
+    class Meta:
+        ordering = ('next_attempt',)
+        indexes = [
+            models.Index(fields=('sent', 'next_attempt'),
+                         name='outgoing_email_pending_idx'),
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,37 @@
+"""Paginator counting big tables by the estimate of the query planner."""
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """An exact COUNT(*) over millions of rows takes seconds on
+    PostgreSQL. There the count is the planner estimate of the rows of
+    the query when it is over estimate_threshold, smaller results and
+    other DataBases are counted exactly. The estimate follows ANALYZE,
+    page links of a big table may be a little off."""
+    estimate_threshold = 10000
+
+    def estimate(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return None
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is not None and estimate > self.estimate_threshold:
+            return estimate
+        return super().count
@@ -0,0 +1,116 @@
+"""Full-text search index over title names, descriptions and review texts.
+
+PostgreSQL keeps a generated tsvector column with a GIN index on each
+table, SQLite keeps FTS5 tables synchronised by triggers. Both are
+maintained by the database itself, so bulk writes stay indexed too.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+SEARCHED_COLUMNS = {
+    'reviews_title': ('name', 'description'),
+    'reviews_review': ('text',),
+}
+
+POSTGRESQL_INDEX = [
+    "ALTER TABLE reviews_title ADD COLUMN IF NOT EXISTS search_vector "
+    "tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS reviews_title_search_idx "
+    "ON reviews_title USING GIN (search_vector)",
+    "ALTER TABLE reviews_review ADD COLUMN IF NOT EXISTS search_vector "
+    "tsvector GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS reviews_review_search_idx "
+    "ON reviews_review USING GIN (search_vector)",
+]
+
+
+def sqlite_index(table, columns):
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    insert = (f'INSERT INTO {fts}(rowid, {names}) '
+              f'VALUES (new.id, {new});')
+    delete = (f"INSERT INTO {fts}({fts}, rowid, {names}) "
+              f"VALUES ('delete', old.id, {old});")
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{names}, content='{table}', content_rowid='id')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT '
+        f'ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE '
+        f'ON {table} BEGIN {delete} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE '
+        f'OF {names} ON {table} BEGIN {delete} {insert} END',
+        # Django rebuilds SQLite tables on most schema changes,
+        # which drops the triggers, so the index is resynchronised here.
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def install(schema_connection):
+    """Creates or repairs the search index, safe to run repeatedly."""
+    if 'reviews_title' not in schema_connection.introspection.table_names():
+        return
+    if schema_connection.vendor == 'postgresql':
+        statements = POSTGRESQL_INDEX
+    elif schema_connection.vendor == 'sqlite':
+        statements = [
+            statement
+            for table, columns in SEARCHED_COLUMNS.items()
+            for statement in sqlite_index(table, columns)
+        ]
+    else:
+        return
+    with schema_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search(queryset, query):
+    """Filters the queryset by the search query and annotates
+    search_rank, higher is better. Every word must match,
+    the last one may be a prefix of a longer word."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(terms) + ':*'
+        matched = (f"{table}.search_vector @@ to_tsquery('simple', %s)",
+                   tsquery)
+        rank = RawSQL(
+            f"ts_rank({table}.search_vector, to_tsquery('simple', %s))",
+            (tsquery,), output_field=FloatField()
+        )
+    elif connection.vendor == 'sqlite':
+        fts = f'{table}_fts'
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        matched = (
+            f'{table}.id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)',
+            match
+        )
+        rank = RawSQL(
+            f'(SELECT -bm25({fts}) FROM {fts} '
+            f'WHERE {fts} MATCH %s AND rowid = {table}.id)',
+            (match,), output_field=FloatField()
+        )
+    else:
+        field = SEARCHED_COLUMNS[table][0]
+        for term in terms:
+            queryset = queryset.filter(**{f'{field}__icontains': term})
+        return queryset.annotate(search_rank=Value(0.0, FloatField()))
+    where, param = matched
+    return queryset.extra(where=[where], params=[param]).annotate(
+        search_rank=rank
+    )
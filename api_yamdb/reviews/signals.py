@@ -0,0 +1,220 @@
+from collections import Counter
+
+from django.db import connections
+from django.db.models import Count, F
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from reviews import search
+from reviews.models import Category, Genre, Review, Title, Tombstone
+
+
+def update_title_rating(title_id, added=None, removed=None):
+    """Adds the score of a new review to the stored rating aggregates
+    and score histogram of a title and removes the score of a deleted
+    one, a changed score is both. F() expressions keep concurrent
+    review writes from losing updates. The same query flags the title
+    for the leaderboards worker."""
+    changes = {
+        'reviews_count': F('reviews_count'),
+        'score_sum': F('score_sum'),
+        'updated_at': timezone.now(),
+        'leaderboard_pending': True,
+    }
+    for score, delta in ((added, 1), (removed, -1)):
+        if score is None:
+            continue
+        bucket = f'score_{score}'
+        changes['reviews_count'] += delta
+        changes['score_sum'] += delta * score
+        changes[bucket] = changes.get(bucket, F(bucket)) + delta
+    Title.objects.filter(pk=title_id).update(**changes)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, raw=False, **kwargs):
+    instance._previous_score = None
+    if not raw and not instance._state.adding:
+        instance._previous_score = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list('score', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def add_review_to_rating(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        update_title_rating(instance.title_id, added=instance.score)
+        return
+    previous_score = getattr(instance, '_previous_score', None)
+    if previous_score is not None and previous_score != instance.score:
+        update_title_rating(
+            instance.title_id, added=instance.score, removed=previous_score
+        )
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_rating(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, removed=instance.score)
+
+
+def update_titles_count(model, pks, delta):
+    """Adds delta to the stored titles_count of genres or categories."""
+    pks = [pk for pk in pks if pk is not None]
+    if pks and delta:
+        model.objects.filter(pk__in=pks).update(
+            titles_count=F('titles_count') + delta
+        )
+
+
+def recount_titles(model, pks):
+    """Sets titles_count of genres or categories from the titles,
+    after bulk writes that send no signals."""
+    counts = (
+        model.objects.filter(pk__in=pks).order_by()
+        .annotate(count=Count('titles')).values_list('pk', 'count')
+    )
+    for pk, count in counts:
+        model.objects.filter(pk=pk).update(titles_count=count)
+
+
+@receiver(pre_save, sender=Title)
+def remember_title_category(sender, instance, raw=False, **kwargs):
+    instance._previous_category_id = None
+    if not raw and not instance._state.adding:
+        instance._previous_category_id = (
+            Title.objects.filter(pk=instance.pk)
+            .values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Title)
+def count_title_in_category(sender, instance, created, raw=False,
+                            **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_category_id', None)
+    if previous != instance.category_id:
+        update_titles_count(Category, (instance.category_id,), 1)
+        update_titles_count(Category, (previous,), -1)
+
+
+@receiver(pre_delete, sender=Title)
+def uncount_title(sender, instance, **kwargs):
+    # the genre rows go with the title without m2m_changed
+    update_titles_count(Category, (instance.category_id,), -1)
+    update_titles_count(
+        Genre, instance.genre.values_list('pk', flat=True), -1
+    )
+
+
+def linked_genres(instance, reverse, pk_set):
+    """(genre, title) rows of the genre changes, the existing ones
+    for removals, pk_set holds titles for reverse changes."""
+    through = Title.genre.through
+    rows = through.objects.filter(
+        **{'genre_id' if reverse else 'title_id': instance.pk}
+    )
+    if pk_set is not None:
+        rows = rows.filter(
+            **{'title_id__in' if reverse else 'genre_id__in': pk_set}
+        )
+    return list(rows.values_list('genre_id', flat=True))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def count_title_in_genres(sender, instance, action, reverse, pk_set,
+                          **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        instance._removed_genres = linked_genres(instance, reverse, pk_set)
+    elif action in ('post_remove', 'post_clear'):
+        removed = Counter(instance.__dict__.pop('_removed_genres', ()))
+        for genre, count in removed.items():
+            update_titles_count(Genre, (genre,), -count)
+    elif action == 'post_add' and pk_set:
+        if reverse:
+            update_titles_count(Genre, (instance.pk,), len(pk_set))
+        else:
+            update_titles_count(Genre, pk_set, 1)
+
+
+def touch_titles(pks):
+    """Moves titles up the change feed after writes that change their
+    representation without saving them, and flags them for the
+    leaderboards worker."""
+    pks = list(pks)
+    if pks:
+        Title.objects.filter(pk__in=pks).update(
+            updated_at=timezone.now(), leaderboard_pending=True
+        )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_titles_of_genres(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if action in ('post_add', 'post_remove') and not pk_set:
+        return
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            touch_titles((instance.pk,))
+    elif action == 'pre_clear':
+        instance._cleared_titles = list(
+            instance.titles.values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        touch_titles(instance.__dict__.pop('_cleared_titles', ()))
+    elif action in ('post_add', 'post_remove'):
+        touch_titles(pk_set)
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def touch_titles_of_deleted(sender, instance, **kwargs):
+    # the titles lose the category or genre without being saved
+    touch_titles(instance.titles.values_list('pk', flat=True))
+
+
+@receiver(pre_save, sender=Title)
+def flag_title_leaderboards(sender, instance, raw=False, **kwargs):
+    # the year or the category may change, new titles have no reviews;
+    # a deleted title leaves its places empty for the worker to refill
+    if not raw and not instance._state.adding:
+        instance.leaderboard_pending = True
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Genre)
+def follow_rename(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('name', 'slug').first()
+    )
+    if previous is None or previous == (instance.name, instance.slug):
+        return
+    # titles show the name and the slug of their genres and category
+    touch_titles(instance.titles.values_list('pk', flat=True))
+    _, slug = previous
+    if slug != instance.slug:
+        # clients know genres and categories by slug, a new slug is
+        # a new object for them and the old one is gone
+        Tombstone.objects.create(model=sender._meta.model_name, key=slug)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def leave_tombstone(sender, instance, **kwargs):
+    key = instance.slug if sender in (Category, Genre) else instance.pk
+    Tombstone.objects.create(model=sender._meta.model_name, key=key)
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    if sender.name == 'reviews':
+        search.install(connections[using])
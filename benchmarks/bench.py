@@ -0,0 +1,255 @@
+"""Latency benchmark of the API endpoints.
+
+Runs scripted scenarios through the in-process test client against a
+SQLite DataBase filled by the generate_data command and reports latency
+percentiles, queries and peak allocated memory per request:
+
+    python benchmarks/bench.py --reviews 1000000 --output before.json
+    python benchmarks/bench.py --compare before.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'api_yamdb')]
+
+row_format = '{:<22} {:>13} {:>13} {:>13} {:>8} {:>9}'
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Benchmark:
+
+    def __init__(self, options):
+        from django.test import Client
+        from reviews.models import Title
+
+        self.options = options
+        self.client = Client()
+        self.title = Title.objects.order_by('pk').first()
+        self.genre = self.title.genre.first()
+        self.bench_users = iter(self.make_users(
+            options.iterations + options.warmup
+        ))
+        self.signups = iter(range(options.iterations + options.warmup))
+        self.deep_cursor = self.walk_cursor(options.depth)
+
+    def make_users(self, count):
+        from reviews.models import User
+
+        first = (User.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0) + 1
+        users = User.objects.bulk_create(
+            User(username=f'bench{first + index}',
+                 email=f'bench{first + index}@yamdb.fake')
+            for index in range(count)
+        )
+        return list(User.objects.filter(
+            username__in=[user.username for user in users]
+        ))
+
+    def authorized(self, user):
+        from api.authentication import RoleAccessToken
+
+        token = RoleAccessToken.for_user(user)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def walk_cursor(self, depth):
+        url = f'/api/v1/titles/{self.title.pk}/reviews/?pagination=cursor'
+        for _ in range(depth):
+            next_url = self.client.get(url).json()['next']
+            if next_url is None:
+                break
+            url = next_url
+        return url
+
+    def clear_cache(self):
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def titles_list(self):
+        self.clear_cache()
+        return self.client.get(
+            '/api/v1/titles/',
+            {'genre': self.genre.slug, 'year': self.title.year}
+        )
+
+    def titles_list_cached(self):
+        return self.client.get('/api/v1/titles/', {'genre': self.genre.slug})
+
+    def title_detail(self):
+        self.clear_cache()
+        return self.client.get(f'/api/v1/titles/{self.title.pk}/')
+
+    def reviews_deep_page(self):
+        self.clear_cache()
+        last_page = max(1, self.title.reviews_count // 10)
+        return self.client.get(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            {'page': min(self.options.depth, last_page)}
+        )
+
+    def reviews_deep_cursor(self):
+        self.clear_cache()
+        return self.client.get(self.deep_cursor)
+
+    def review_create(self):
+        user = next(self.bench_users)
+        return self.client.post(
+            f'/api/v1/titles/{self.title.pk}/reviews/',
+            {'text': 'Benchmark review', 'score': 7},
+            content_type='application/json',
+            **self.authorized(user)
+        )
+
+    def signup_token(self):
+        from django.contrib.auth.tokens import default_token_generator
+        from reviews.models import User
+
+        number = next(self.signups)
+        username = f'signup{os.getpid()}x{number}'
+        self.client.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake'
+        }, content_type='application/json')
+        code = default_token_generator.make_token(
+            User.objects.get(username=username)
+        )
+        return self.client.post('/api/v1/auth/token/', {
+            'username': username, 'confirmation_code': code
+        }, content_type='application/json')
+
+    SCENARIOS = (
+        'titles_list', 'titles_list_cached', 'title_detail',
+        'reviews_deep_page', 'reviews_deep_cursor', 'review_create',
+        'signup_token',
+    )
+
+    def run(self, name):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        scenario = getattr(self, name)
+        for _ in range(self.options.warmup):
+            scenario()
+        timings, queries, peaks = [], [], []
+        for index in range(self.options.iterations):
+            measure_memory = index < self.options.memory_iterations
+            if measure_memory:
+                tracemalloc.start()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = scenario()
+                elapsed = time.perf_counter() - started
+            if measure_memory:
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            else:
+                timings.append(elapsed * 1000)
+            assert response.status_code < 400, (name, response.content)
+            queries.append(len(captured))
+        return {
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'queries': max(queries),
+            'peak_kib': max(peaks) / 1024 if peaks else None,
+        }
+
+
+def prepare_database(options):
+    from django.core.management import call_command
+    from reviews.models import Title
+
+    call_command('migrate', verbosity=0)
+    if not Title.objects.exists():
+        call_command(
+            'generate_data', titles=options.titles, users=options.users,
+            reviews=options.reviews, seed=0
+        )
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'), cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(results, baseline):
+    print(row_format.format(
+        'scenario', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'peak KiB'
+    ))
+    for name, result in results.items():
+        old = baseline.get(name)
+        cells = []
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            cell = f'{result[key]:.2f}'
+            if old:
+                cell += f' {(result[key] / old[key] - 1) * 100:+.0f}%'
+            cells.append(cell)
+        peak = result['peak_kib']
+        print(row_format.format(
+            name, *cells, result['queries'],
+            '-' if peak is None else f'{peak:.0f}'
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='SQLite file, reused between runs')
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument(
+        '--memory-iterations', type=int, default=10,
+        help='Iterations traced with tracemalloc, excluded from latency'
+    )
+    parser.add_argument(
+        '--depth', type=int, default=50,
+        help='Page reached by the deep pagination scenarios'
+    )
+    parser.add_argument('--scenario', action='append',
+                        choices=Benchmark.SCENARIOS)
+    parser.add_argument('--output', help='Write the results to a JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run')
+    options = parser.parse_args()
+
+    if options.db:
+        os.environ['BENCHMARK_DB'] = options.db
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    prepare_database(options)
+    benchmark = Benchmark(options)
+    results = {
+        name: benchmark.run(name)
+        for name in options.scenario or Benchmark.SCENARIOS
+    }
+    baseline = {}
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)['results']
+    report(results, baseline)
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump({'revision': git_revision(), 'results': results},
+                      file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
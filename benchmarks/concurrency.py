@@ -0,0 +1,176 @@
+"""Concurrency benchmark of the WSGI and ASGI serving modes.
+
+Serves the project with gunicorn sync workers and with uvicorn workers,
+the same number of worker processes in both modes so memory stays about
+the same, and fires concurrent GET requests at the title list, title
+detail and review list endpoints. Reports throughput, latency
+percentiles and the resident memory of the server processes:
+
+    python benchmarks/concurrency.py --workers 2 --concurrency 1 8 32
+
+Needs gunicorn and uvicorn from requirements.txt and Linux /proc.
+The response cache is off unless --cache is given, so every request
+reaches the DataBase.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'api_yamdb')]
+
+from benchmarks.bench import percentile, prepare_database  # noqa: E402
+
+SERVERS = {
+    'wsgi': ('api_yamdb.wsgi:application',),
+    'asgi': ('api_yamdb.asgi:application',
+             '--worker-class', 'uvicorn.workers.UvicornWorker'),
+}
+
+DUMMY_CACHE = 'django.core.cache.backends.dummy.DummyCache'
+
+row_format = '{:<6} {:>11} {:>9} {:>9} {:>9} {:>9} {:>8}'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid):
+    pids = [pid]
+    for parent in pids:
+        try:
+            with open(f'/proc/{parent}/task/{parent}/children') as file:
+                pids.extend(int(child) for child in file.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def resident_memory(pid):
+    """Resident memory of the process and its children, in MiB."""
+    total = 0
+    for child in process_tree(pid):
+        try:
+            with open(f'/proc/{child}/status') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total / 1024
+
+
+class Server:
+
+    def __init__(self, mode, options):
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='benchmarks.settings',
+            PYTHONPATH=os.pathsep.join(sys.path[:2]),
+            ASYNC_VIEWS=str(mode == 'asgi'),
+            METRICS_LOG_LEVEL='WARNING',
+        )
+        if not options.cache:
+            env['CACHE_BACKEND'] = DUMMY_CACHE
+        self.process = subprocess.Popen(
+            ('gunicorn', *SERVERS[mode], '--workers', str(options.workers),
+             '--bind', f'127.0.0.1:{self.port}', '--log-level', 'warning'),
+            cwd=os.path.join(ROOT, 'api_yamdb'), env=env
+        )
+
+    def __enter__(self):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(f'{self.url}/api/v1/genres/')
+                return self
+            except (URLError, ConnectionError):
+                time.sleep(0.2)
+        self.process.kill()
+        raise RuntimeError('The server did not start')
+
+    def __exit__(self, *args):
+        self.process.terminate()
+        self.process.wait()
+
+
+def fetch(url):
+    started = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def load(server, paths, concurrency, requests):
+    urls = [server.url + paths[index % len(paths)]
+            for index in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        timings = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': requests / elapsed,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'rss_mib': resident_memory(server.process.pid),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', help='SQLite file, reused between runs')
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=(1, 8, 32))
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Requests per concurrency level')
+    parser.add_argument('--mode', action='append', choices=tuple(SERVERS))
+    parser.add_argument('--cache', action='store_true',
+                        help='Keep the anonymous response cache on')
+    options = parser.parse_args()
+
+    if options.db:
+        os.environ['BENCHMARK_DB'] = os.path.abspath(options.db)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+    from reviews.models import Title
+
+    prepare_database(options)
+    title = Title.objects.order_by('pk').first()
+    paths = (
+        '/api/v1/titles/',
+        f'/api/v1/titles/{title.pk}/',
+        f'/api/v1/titles/{title.pk}/reviews/',
+    )
+    print(row_format.format(
+        'mode', 'concurrency', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'RSS MiB'
+    ))
+    for mode in options.mode or tuple(SERVERS):
+        with Server(mode, options) as server:
+            for concurrency in options.concurrency:
+                result = load(server, paths, concurrency, options.requests)
+                print(row_format.format(
+                    mode, concurrency, f'{result["rps"]:.0f}',
+                    f'{result["p50_ms"]:.1f}', f'{result["p95_ms"]:.1f}',
+                    f'{result["p99_ms"]:.1f}', f'{result["rss_mib"]:.0f}'
+                ))
+
+
+if __name__ == '__main__':
+    main()
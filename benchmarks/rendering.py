@@ -0,0 +1,98 @@
+"""CPU benchmark of the JSON renderer of the API.
+
+Renders a page of reviews, in the envelope of the page number pagination,
+with DRF's JSONRenderer and with api.renderers.FastJSONRenderer. Reports
+the CPU time per page for every page size:
+
+    python benchmarks/rendering.py --sizes 10 100 1000
+
+No DataBase is needed, the reviews are built in memory. FastJSON times
+equal to DRF's mean orjson is not installed.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'api_yamdb')]
+
+row_format = '{:>6} {:>12} {:>12} {:>8}'
+
+
+def make_page(size, text_length):
+    from api.serializers import ReviewSerializer
+    from reviews.models import Review, User
+
+    started = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    reviews = [
+        Review(
+            id=number,
+            text=('Отзыв ' * text_length)[:text_length],
+            author=User(username=f'author{number}'),
+            score=number % 10 + 1,
+            pub_date=started + timedelta(minutes=number)
+        )
+        for number in range(size)
+    ]
+    return OrderedDict((
+        ('count', size * 10),
+        ('next', 'http://testserver/api/v1/titles/1/reviews/?page=2'),
+        ('previous', None),
+        ('results', ReviewSerializer(reviews, many=True).data),
+    ))
+
+
+def cpu_time(function, iterations):
+    """CPU seconds per call, the best of five rounds."""
+    rounds = []
+    for _ in range(5):
+        started = time.process_time()
+        for _ in range(iterations):
+            function()
+        rounds.append((time.process_time() - started) / iterations)
+    return min(rounds)
+
+
+def measure(size, options):
+    """CPU seconds per page of JSONRenderer and FastJSONRenderer."""
+    from api.renderers import FastJSONRenderer
+    from rest_framework.renderers import JSONRenderer
+
+    page = make_page(size, options.text_length)
+    iterations = max(1, options.items // size)
+    return [
+        cpu_time(
+            lambda: renderer.render(page, 'application/json', {}), iterations
+        )
+        for renderer in (JSONRenderer(), FastJSONRenderer())
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('--text-length', type=int, default=1000,
+                        help='Characters of every review text')
+    parser.add_argument('--items', type=int, default=20000,
+                        help='Reviews rendered per round and page size')
+    options = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+    print(row_format.format('page', 'render µs', 'fast µs', 'saved'))
+    for size in options.sizes:
+        slow, fast = measure(size, options)
+        print(row_format.format(
+            size, f'{slow * 1e6:.0f}', f'{fast * 1e6:.0f}',
+            f'{(1 - fast / slow) * 100:.0f}%'
+        ))
+
+
+if __name__ == '__main__':
+    main()
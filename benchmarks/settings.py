@@ -0,0 +1,25 @@
+"""Project settings with a local SQLite DataBase for the benchmarks."""
+import os
+
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv(
+            'BENCHMARK_DB',
+            default=os.path.join(BASE_DIR.parent, 'benchmarks', 'bench.sqlite3')
+        ),
+    }
+}
+
+ALLOWED_HOSTS = ['testserver', '127.0.0.1']
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# the scenarios sign up and review far faster than any client may
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    'DEFAULT_THROTTLE_RATES': {},
+}
@@ -1,9 +1,49 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
+TEST_DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+    # stands in for a read replica, used only where a test routes to it
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    },
+}
+
 pytest_plugins = [
+    'tests.fixtures.fixture_user',
+    'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings():
+    """Behaviour tests run against SQLite so they don't need a PostgreSQL
+    server; the project settings module itself is left untouched."""
+    connections.close_all()
+    for alias in connections:
+        if hasattr(connections._connections, alias):
+            del connections[alias]
+    connections._settings = connections.configure_settings(TEST_DATABASES)
+    for alias, database in TEST_DATABASES.items():
+        # test database creation records the name in settings as well
+        settings.DATABASES.setdefault(alias, dict(database))
+    connections.__dict__['settings'] = connections._settings
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+from reviews.paginators import EstimatedCountPaginator
+
+
+@pytest.fixture
+def staff_client(django_user_model):
+    superuser = django_user_model.objects.create_superuser(
+        username='superuser', email='superuser@yamdb.fake', password='pass'
+    )
+    client = Client()
+    client.force_login(superuser)
+    return client
+
+
+def add_rows(count, category, genres, django_user_model):
+    for _ in range(count):
+        number = Title.objects.count()
+        title = Title.objects.create(name=f'Title {number}', year=2000,
+                                     category=category)
+        title.genre.set(genres)
+        author = django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        review = Review.objects.create(title=title, author=author,
+                                       text='text', score=5)
+        Comment.objects.create(review=review, author=author, text='text')
+
+
+@pytest.mark.django_db
+class TestChangelists:
+
+    @pytest.mark.parametrize('model', ('title', 'review', 'comment'))
+    def test_queries_do_not_grow(self, staff_client, category, genres,
+                                 django_user_model, model):
+        queries = []
+        for count in (2, 10):
+            add_rows(count, category, genres, django_user_model)
+            with CaptureQueriesContext(connection) as context:
+                response = staff_client.get(f'/admin/reviews/{model}/')
+            assert response.status_code == 200
+            queries.append(len(context))
+        assert queries[0] == queries[1], (
+            f'Проверьте, что число запросов списка {model} в админке '
+            f'не зависит от числа строк: {queries}'
+        )
+
+    def test_title_genres(self, staff_client, title):
+        response = staff_client.get('/admin/reviews/title/')
+        assert 'Драма, Комедия' in response.content.decode(), (
+            'Проверьте, что список произведений показывает их жанры'
+        )
+
+    def test_review_form_has_no_choices(self, staff_client, title, user):
+        content = staff_client.get('/admin/reviews/review/add/').content
+        assert b'admin-autocomplete' in content
+        assert title.name.encode() not in content, (
+            'Проверьте, что форма отзыва не загружает все произведения'
+        )
+
+
+class EstimatedPaginator(EstimatedCountPaginator):
+    estimated = None
+
+    def estimate(self):
+        return self.estimated
+
+
+@pytest.mark.django_db
+def test_estimated_count(title):
+    paginator = EstimatedCountPaginator(Title.objects.all(), 10)
+    assert paginator.estimate() is None
+    assert paginator.count == 1
+    paginator = EstimatedPaginator(Title.objects.all(), 10)
+    paginator.estimated = 5000000
+    assert paginator.count == 5000000, (
+        'Проверьте, что большая таблица считается по оценке планировщика'
+    )
+    paginator = EstimatedPaginator(Title.objects.all(), 10)
+    paginator.estimated = 20
+    assert paginator.count == 1
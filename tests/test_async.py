@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from api.views import ReviewViewSet, TitleViewSet
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, AsyncRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api_yamdb.asgi import application
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncViews:
+    """Views run in the thread pool with their own connections,
+    so the data must be committed."""
+
+    def test_title_list(self, settings, title):
+        settings.ASYNC_VIEWS = True
+        view = TitleViewSet.as_view({'get': 'list'})
+        assert asyncio.iscoroutinefunction(view), (
+            'Проверьте, что в режиме ASGI представление асинхронное'
+        )
+        request = AsyncRequestFactory().get('/api/v1/titles/')
+        response = async_to_sync(view)(request)
+        assert response.status_code == 200
+        assert response.data['count'] == 1
+
+    def test_permissions_unchanged(self, settings, user, review):
+        settings.ASYNC_VIEWS = True
+        view = ReviewViewSet.as_view({'delete': 'destroy'})
+        factory = AsyncRequestFactory()
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+        response = async_to_sync(view)(
+            factory.delete(url), title_id=review.title_id, pk=review.pk
+        )
+        assert response.status_code == 401
+        request = factory.delete(url)
+        request.META['HTTP_AUTHORIZATION'] = (
+            f'Bearer {AccessToken.for_user(user)}'
+        )
+        response = async_to_sync(view)(
+            request, title_id=review.title_id, pk=review.pk
+        )
+        assert response.status_code == 204
+
+    def test_asgi_middleware(self, title):
+        response = async_to_sync(AsyncClient().get)('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'desc="' in response['Server-Timing'], (
+            'Проверьте, что метрики запроса работают в режиме ASGI'
+        )
+
+    def test_asgi_export_stream(self, admin, genres):
+        """The export queries run while the response is sent."""
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(application)({
+            'type': 'http', 'method': 'GET', 'query_string': b'',
+            'path': '/api/v1/export/genre.csv',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization',
+                 f'Bearer {AccessToken.for_user(admin)}'.encode()),
+            ],
+        }, receive, send)
+        assert messages[0]['status'] == 200
+        body = b''.join(message.get('body', b'') for message in messages)
+        assert body.decode().splitlines() == [
+            'id,name,slug',
+            *(f'{genre.pk},{genre.name},{genre.slug}' for genre in genres),
+        ], 'Проверьте, что выгрузка передаётся целиком в режиме ASGI'
+        assert messages[-1] == {'type': 'http.response.body'}
@@ -0,0 +1,72 @@
+import pytest
+from api.authentication import RoleAccessToken, StatelessJWTAuthentication
+from api.cache import get_cache
+from api.serializers import ProfileSerializer
+from api.views import UserViewSet
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import APIRequestFactory
+
+
+def authenticate(token):
+    request = APIRequestFactory().get(
+        '/', HTTP_AUTHORIZATION=f'Bearer {token}'
+    )
+    return StatelessJWTAuthentication().authenticate(request)[0]
+
+
+@pytest.mark.django_db
+class TestStatelessAuthentication:
+
+    def test_user_from_claims(self, admin, django_assert_num_queries):
+        token = RoleAccessToken.for_user(admin)
+        with django_assert_num_queries(0):
+            user = authenticate(token)
+            assert user.is_admin and not user.is_superuser
+            assert user.username == admin.username
+            assert user == admin
+        with django_assert_num_queries(1):
+            assert user.email == admin.email, (
+                'Проверьте, что остальные поля подгружаются по требованию'
+            )
+
+    def test_role_change_revokes_claims(self, admin,
+                                        django_assert_num_queries):
+        token = RoleAccessToken.for_user(admin)
+        admin.role = admin.USER
+        admin.save()
+        with django_assert_num_queries(1):
+            user = authenticate(token)
+        assert not user.is_admin, (
+            'Проверьте, что после смены роли токен не даёт старых прав'
+        )
+
+    def test_revocation_outlives_culling(self, admin,
+                                         django_assert_num_queries):
+        token = RoleAccessToken.for_user(admin)
+        admin.role = admin.USER
+        admin.save()
+        for number in range(1000):
+            get_cache().set(f'api:filler:{number}', number)
+        with django_assert_num_queries(1):
+            user = authenticate(token)
+        assert not user.is_admin, (
+            'Проверьте, что ответы API в кеше не вытесняют отзыв прав'
+        )
+
+    def test_profile(self, user):
+        token = RoleAccessToken.for_user(user)
+        request = APIRequestFactory().patch(
+            '/api/v1/users/me/', {'bio': 'about'}, format='json',
+            HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        view = UserViewSet.as_view(
+            {'patch': 'set_profile'},
+            authentication_classes=(StatelessJWTAuthentication,),
+            permission_classes=(IsAuthenticated,),
+            serializer_class=ProfileSerializer
+        )
+        response = view(request)
+        assert response.status_code == 200
+        assert response.data['email'] == user.email
+        user.refresh_from_db()
+        assert user.bio == 'about'
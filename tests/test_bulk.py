@@ -0,0 +1,90 @@
+import json
+
+import pytest
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db
+class TestBulkUpsert:
+
+    def test_admin_only(self, client, user_client):
+        assert client.post('/api/v1/genres/bulk/', [],
+                           content_type='application/json'
+                           ).status_code == 401
+        assert user_client.post('/api/v1/genres/bulk/', [],
+                                format='json').status_code == 403
+
+    def test_genres_upsert(self, admin_client, genres):
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'name': 'Драматургия', 'slug': 'drama'},
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Комедия', 'slug': 'other'},
+            {'name': 'Без адреса'},
+            {'name': 'Снова ужасы', 'slug': 'horror'},
+        ], format='json')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['created'] == ['horror']
+        assert data['updated'] == ['drama']
+        assert [error['index'] for error in data['errors']] == [2, 3, 4], (
+            'Проверьте, что ошибки элементов возвращаются с их индексами, '
+            'а остальные элементы сохраняются'
+        )
+        assert Genre.objects.get(slug='drama').name == 'Драматургия'
+        assert Genre.objects.get(slug='horror').name == 'Ужасы'
+
+    def test_categories_ndjson(self, admin_client):
+        body = '\n'.join(json.dumps(item) for item in (
+            {'name': 'Фильм', 'slug': 'movie'},
+            {'name': 'Книга', 'slug': 'book'},
+        ))
+        response = admin_client.post(
+            '/api/v1/categories/bulk/', body,
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == 200
+        assert response.json()['created'] == ['movie', 'book']
+        assert Category.objects.count() == 2
+
+    def test_titles_upsert(self, admin_client, title, category, genres,
+                           django_assert_max_num_queries):
+        items = [
+            {'name': f'Новое {index}', 'year': 2000, 'category': 'movie',
+             'genre': ['drama', 'comedy']}
+            for index in range(20)
+        ]
+        items += [
+            {'id': title.pk, 'name': 'Переименовано', 'year': 1994,
+             'category': 'movie', 'genre': ['comedy']},
+            {'name': 'Неизвестный жанр', 'year': 2000, 'category': 'movie',
+             'genre': ['unknown']},
+            {'id': 0, 'name': 'Нет такого', 'year': 2000,
+             'category': 'movie', 'genre': []},
+            {'name': 'Из будущего', 'year': 3000, 'category': 'movie',
+             'genre': []},
+        ]
+        # SQLite cannot return ids from bulk inserts, so new titles
+        # are inserted one by one there
+        with django_assert_max_num_queries(len(items) + 15):
+            response = admin_client.post('/api/v1/titles/bulk/', items,
+                                         format='json')
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data['created']) == 20
+        assert data['updated'] == [title.pk]
+        assert [error['index'] for error in data['errors']] == [21, 22, 23]
+        title.refresh_from_db()
+        assert title.name == 'Переименовано'
+        assert list(title.genre.values_list('slug', flat=True)) == [
+            'comedy']
+        assert Title.objects.get(name='Новое 0').genre.count() == 2
+
+    def test_titles_invalidate_cache(self, client, admin_client, title):
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+        admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Новое', 'year': 2000, 'category': 'movie',
+             'genre': ['drama']},
+        ], format='json')
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что массовая запись сбрасывает кеш произведений'
+        )
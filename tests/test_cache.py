@@ -0,0 +1,84 @@
+import pytest
+from api.cache import get_version
+from reviews.models import Genre, Review, Title
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_anonymous_list_is_cached(self, client, title,
+                                      django_assert_num_queries):
+        client.get('/api/v1/titles/')
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 1
+
+    def test_write_invalidates(self, client, title, user,
+                               django_capture_on_commit_callbacks):
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(title=title, author=user, text='t',
+                                  score=6)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['rating'] == 6, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведений'
+        )
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        assert response.json()['count'] == 1
+        with django_capture_on_commit_callbacks(execute=True):
+            Genre.objects.filter(slug='drama').get().delete()
+        response = client.get('/api/v1/titles/')
+        assert len(response.json()['results'][0]['genre']) == 1
+
+    def test_etag(self, client, title, django_capture_on_commit_callbacks):
+        response = client.get('/api/v1/genres/')
+        etag = response['ETag']
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        with django_capture_on_commit_callbacks(execute=True):
+            Genre.objects.create(name='Ужасы', slug='horror')
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['count'] == 3
+
+    def test_authenticated_bypass(self, user_client, title):
+        user_client.get('/api/v1/titles/')
+        # queryset updates send no signals and leave the cache as is
+        Title.objects.update(name='Другое')
+        response = user_client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['name'] == 'Другое', (
+            'Проверьте, что ответы авторизованным пользователям не кешируются'
+        )
+
+    def test_invalidated_on_commit(self, title, user,
+                                   django_capture_on_commit_callbacks):
+        version = get_version('titles')
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(title=title, author=user, text='t',
+                                  score=6)
+            assert get_version('titles') == version, (
+                'Проверьте, что кеш сбрасывается после коммита записи, '
+                'а не внутри транзакции'
+            )
+        assert get_version('titles') != version
+
+    def test_username_change_invalidates(self, client, title, user,
+                                         django_capture_on_commit_callbacks):
+        review = Review.objects.create(title=title, author=user, text='t',
+                                       score=6)
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        review.comments.create(author=user, text='t')
+        client.get(reviews_url)
+        client.get(comments_url)
+        user.username = 'renamed'
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+        for url in (reviews_url, comments_url):
+            author = client.get(url).json()['results'][0]['author']
+            assert author == 'renamed', (
+                'Проверьте, что смена имени пользователя сбрасывает кеш '
+                'его отзывов и комментариев'
+            )
@@ -0,0 +1,169 @@
+from datetime import timedelta
+
+import pytest
+from api import changes
+from api.changes import Position, encode_token
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Category, Genre, Review, Tombstone
+
+
+@pytest.fixture
+def feed_settings(settings):
+    settings.CHANGES_SETTLE_SECONDS = 0
+    settings.CHANGES_PAGE_SIZE = 3
+    return settings
+
+
+def sync(client, token=None):
+    """All items after the token and the token of the next sync."""
+    items = []
+    while True:
+        params = {} if token is None else {'since': token}
+        response = client.get('/api/v1/changes/', params)
+        assert response.status_code == 200
+        page = response.json()
+        items += page['results']
+        token = page['next']
+        if not page['has_more']:
+            return items, token
+
+
+def keys(items):
+    return [
+        (item['type'], item['deleted'],
+         item['data'].get('slug', item['data'].get('id')))
+        for item in items
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('feed_settings')
+class TestChanges:
+
+    def test_full_and_incremental_sync(self, client, review, genres):
+        items, token = sync(client)
+        assert sorted(keys(items)) == sorted([
+            ('category', False, 'movie'), ('genre', False, 'drama'),
+            ('genre', False, 'comedy'), ('title', False, review.title_id),
+            ('review', False, review.pk),
+        ]), 'Проверьте, что первая синхронизация отдаёт весь каталог'
+        assert sync(client, token)[0] == [], (
+            'Проверьте, что без изменений лента пуста'
+        )
+        review.text = 'Новый текст'
+        review.save()
+        genres[1].delete()
+        items, token = sync(client, token)
+        assert keys(items) == [
+            ('review', False, review.pk),
+            ('title', False, review.title_id),
+            ('genre', True, 'comedy'),
+        ], 'Проверьте, что лента отдаёт только изменения после токена'
+        assert items[0]['data']['text'] == 'Новый текст'
+        assert items[0]['data']['title'] == review.title_id
+        assert [genre['slug'] for genre in items[1]['data']['genre']] == [
+            'drama'
+        ], 'Проверьте, что удаление жанра обновляет его произведения'
+
+    def test_rating_moves_title(self, client, title, another_user):
+        token = sync(client)[1]
+        review = Review.objects.create(title=title, author=another_user,
+                                       text='Да', score=4)
+        items = sync(client, token)[0]
+        assert keys(items) == [
+            ('review', False, review.pk), ('title', False, title.pk)
+        ]
+        assert items[1]['data']['rating'] == 4, (
+            'Проверьте, что новый отзыв возвращает произведение в ленту'
+        )
+
+    def test_deleted_title(self, client, review):
+        title_id, review_id = review.title_id, review.pk
+        token = sync(client)[1]
+        review.title.delete()
+        assert sorted(keys(sync(client, token)[0])) == [
+            ('review', True, review_id), ('title', True, title_id)
+        ], 'Проверьте, что удаление произведения оставляет следы'
+
+    def test_renamed_slug(self, client, category):
+        token = sync(client)[1]
+        category.slug = 'film'
+        category.save()
+        assert keys(sync(client, token)[0]) == [
+            ('category', True, 'movie'), ('category', False, 'film')
+        ], 'Проверьте, что смена slug удаляет объект со старым slug'
+
+    def test_renamed_genre_moves_titles(self, client, title):
+        token = sync(client)[1]
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+        assert keys(sync(client, token)[0]) == [
+            ('title', False, title.pk), ('genre', False, 'drama')
+        ], 'Проверьте, что переименование жанра возвращает его произведения'
+
+    def test_page_queries(self, client, title, review,
+                          django_assert_num_queries):
+        Category.objects.create(name='Книга', slug='book')
+        with django_assert_num_queries(6):
+            page = client.get('/api/v1/changes/').json()
+        assert page['has_more'] and len(page['results']) == 3, (
+            'Проверьте, что лента отдаёт страницы по CHANGES_PAGE_SIZE'
+        )
+
+    def test_settle_window(self, client, title, feed_settings):
+        feed_settings.CHANGES_SETTLE_SECONDS = 60
+        assert sync(client)[0] == [], (
+            'Проверьте, что лента ждёт CHANGES_SETTLE_SECONDS'
+        )
+        feed_settings.CHANGES_SETTLE_SECONDS = 0
+        assert len(sync(client)[0]) == 4
+
+    def test_open_transaction(self, client, title, feed_settings,
+                              monkeypatch):
+        started = timezone.now() - timedelta(minutes=10)
+        monkeypatch.setattr(changes, 'oldest_transaction', lambda: started)
+        items, token = sync(client)
+        assert items == [], (
+            'Проверьте, что лента не проходит начало открытой транзакции'
+        )
+        monkeypatch.setattr(changes, 'oldest_transaction', lambda: None)
+        assert len(sync(client, token)[0]) == 4
+
+    def test_bad_tokens(self, client):
+        for token in ('abc', encode_token(Position(timezone.now(), 9, 1))):
+            response = client.get('/api/v1/changes/', {'since': token})
+            assert response.status_code == 400, (
+                'Проверьте, что неверный токен возвращает статус 400'
+            )
+        expired = encode_token(
+            Position(timezone.now() - timedelta(days=91), 0, 0)
+        )
+        response = client.get('/api/v1/changes/', {'since': expired})
+        assert response.status_code == 410, (
+            'Проверьте, что токен старше записей об удалениях возвращает 410'
+        )
+
+    def test_bulk_upsert(self, client, admin_client, title):
+        token = sync(client)[1]
+        response = admin_client.post('/api/v1/genres/bulk/', [
+            {'slug': 'drama', 'name': 'Драма!'}
+        ], format='json')
+        assert response.status_code == 200
+        assert keys(sync(client, token)[0]) == [
+            ('genre', False, 'drama'), ('title', False, title.pk)
+        ], 'Проверьте, что пакетная загрузка попадает в ленту'
+
+
+@pytest.mark.django_db
+def test_prune_tombstones():
+    Genre.objects.create(name='Ужасы', slug='horror').delete()
+    Tombstone.objects.create(model='genre', key='old')
+    Tombstone.objects.filter(key='old').update(
+        deleted_at=timezone.now() - timedelta(days=100)
+    )
+    call_command('prune_tombstones', verbosity=0)
+    assert list(Tombstone.objects.values_list('key', flat=True)) == [
+        'horror'
+    ]
@@ -0,0 +1,146 @@
+import pytest
+from reviews.models import Genre, Review, Title
+
+
+def revalidate(client, url, response, django_assert_max_num_queries,
+               queries=2):
+    """Response to the validators of an earlier response, checks
+    that a 304 costs no more than the user and the stamps lookups."""
+    headers = {'HTTP_IF_NONE_MATCH': response['ETag']}
+    with django_assert_max_num_queries(queries):
+        return client.get(url, **headers)
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_title(self, user_client, title, another_user,
+                   django_assert_max_num_queries):
+        url = f'/api/v1/titles/{title.pk}/'
+        response = user_client.get(url)
+        assert 'Last-Modified' in response
+        assert revalidate(
+            user_client, url, response, django_assert_max_num_queries
+        ).status_code == 304, (
+            'Проверьте, что If-None-Match без изменений возвращает 304'
+        )
+        not_modified = user_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert not_modified.status_code == 304, (
+            'Проверьте, что If-Modified-Since без изменений возвращает 304'
+        )
+        Review.objects.create(title=title, author=another_user, text='Да',
+                              score=3)
+        response = revalidate(
+            user_client, url, response, django_assert_max_num_queries, 5
+        )
+        assert response.status_code == 200
+        assert response.json()['rating'] == 3, (
+            'Проверьте, что новый отзыв меняет ETag произведения'
+        )
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+        assert revalidate(
+            user_client, url, response, django_assert_max_num_queries, 5
+        ).status_code == 200, (
+            'Проверьте, что переименование жанра меняет ETag произведения'
+        )
+
+    def test_title_list(self, user_client, title, category,
+                        django_assert_max_num_queries):
+        url = '/api/v1/titles/?genre=drama'
+        response = user_client.get(url)
+        assert revalidate(
+            user_client, url, response, django_assert_max_num_queries, 5
+        ).status_code == 304
+        assert user_client.get(
+            '/api/v1/titles/?genre=comedy', HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 200, 'Проверьте, что ETag зависит от фильтров'
+        Title.objects.create(name='Другое', year=2000, category=category)
+        Title.objects.get(name='Другое').delete()
+        assert user_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 200, (
+            'Проверьте, что удаление произведения меняет ETag списка'
+        )
+
+    def test_weighted_rating_has_no_last_modified(self, user_client, title):
+        response = user_client.get(f'/api/v1/titles/{title.pk}/stats/')
+        assert 'ETag' in response
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что статистика зависит от средней оценки всех '
+            'отзывов и не отдаёт Last-Modified'
+        )
+
+    def test_reviews(self, user_client, review,
+                     django_assert_max_num_queries):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response = user_client.get(url)
+        assert revalidate(
+            user_client, url, response, django_assert_max_num_queries
+        ).status_code == 304
+        review.text = 'Новый текст'
+        review.save()
+        response = revalidate(
+            user_client, url, response, django_assert_max_num_queries, 6
+        )
+        assert response.json()['results'][0]['text'] == 'Новый текст', (
+            'Проверьте, что изменение отзыва меняет ETag списка отзывов'
+        )
+        detail = user_client.get(f'{url}{review.pk}/')
+        assert revalidate(
+            user_client, f'{url}{review.pk}/', detail,
+            django_assert_max_num_queries
+        ).status_code == 304
+
+    def test_comments(self, user_client, comment, another_user,
+                      django_assert_max_num_queries):
+        review = comment.review
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.pk}'
+               '/comments/')
+        extra = review.comments.create(author=another_user, text='Ещё')
+        response = user_client.get(url)
+        assert 'Last-Modified' not in response
+        assert revalidate(
+            user_client, url, response, django_assert_max_num_queries
+        ).status_code == 304
+        comment.delete()
+        assert user_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 200, (
+            'Проверьте, что удаление комментария меняет ETag списка'
+        )
+        detail = user_client.get(f'{url}{extra.pk}/')
+        assert revalidate(
+            user_client, f'{url}{extra.pk}/', detail,
+            django_assert_max_num_queries
+        ).status_code == 304
+
+    def test_missing_objects(self, user_client, title):
+        for url in (f'/api/v1/titles/{title.pk + 1}/', '/api/v1/titles/x/',
+                    f'/api/v1/titles/{title.pk + 1}/reviews/'):
+            response = user_client.get(url, HTTP_IF_NONE_MATCH='"x"')
+            assert response.status_code == 404
+
+    def test_anonymous_validators(self, client, user_client, title,
+                                  django_assert_num_queries):
+        url = f'/api/v1/titles/{title.pk}/'
+        response = client.get(url)
+        assert response['ETag'] == user_client.get(url)['ETag'], (
+            'Проверьте, что анонимные и авторизованные ответы используют '
+            'одни и те же валидаторы'
+        )
+        etag = response['ETag']
+        for headers in (
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+            {'HTTP_IF_NONE_MATCH': f'W/{etag}'},
+            {'HTTP_IF_NONE_MATCH': f'"other", {etag}'},
+        ):
+            # validators of the cached response, no queries
+            with django_assert_num_queries(0):
+                not_modified = client.get(url, **headers)
+            assert not_modified.status_code == 304, (
+                f'Проверьте условный запрос анонимного пользователя {headers}'
+            )
@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+from django.db import OperationalError
+from django.db.utils import ConnectionHandler
+from reviews.models import Category, Title
+
+from api_yamdb.db import health
+
+
+@pytest.fixture
+def pooled(tmp_path):
+    def handler():
+        return ConnectionHandler({'default': {
+            'ENGINE': 'api_yamdb.db.backends.sqlite3',
+            'NAME': str(tmp_path / 'pooled.sqlite3'),
+            'POOL_SIZE': 1,
+            'POOL_TIMEOUT': 0.1,
+            'CONN_HEALTH_CHECKS': True,
+        }})
+    return handler
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+class TestReplicaRouter:
+
+    def test_safe_requests_read_replica(self, settings, client, category):
+        settings.DATABASE_REPLICA = 'replica'
+        Title.objects.using('replica').create(name='Только в реплике',
+                                              year=2000)
+        response = client.get('/api/v1/titles/')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Только в реплике'
+        ], 'Проверьте, что GET-запросы читают из реплики'
+
+    def test_writes_go_to_default(self, settings, admin_client):
+        settings.DATABASE_REPLICA = 'replica'
+        response = admin_client.post(
+            '/api/v1/categories/', {'name': 'Книга', 'slug': 'book'}
+        )
+        assert response.status_code == 201
+        assert Category.objects.using('default').filter(slug='book').exists()
+        assert not Category.objects.using('replica').exists()
+
+    def test_without_replica(self, client, title):
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 1
+
+
+@pytest.mark.django_db
+class TestConnectionPool:
+
+    def test_reuses_connection(self, pooled):
+        connection = pooled()['default']
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+        connection.ensure_connection()
+        assert connection.connection is raw, (
+            'Проверьте, что закрытое соединение возвращается в пул'
+        )
+        connection.close()
+
+    def test_shared_between_threads(self, pooled):
+        connection = pooled()['default']
+        connection.ensure_connection()
+        raw = connection.connection
+        connection.close()
+        seen = []
+
+        def work():
+            other = pooled()['default']
+            other.ensure_connection()
+            seen.append(other.connection)
+            other.close()
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        assert seen == [raw]
+
+    def test_pool_limit(self, pooled):
+        connection = pooled()['default']
+        connection.ensure_connection()
+        with pytest.raises(OperationalError):
+            pooled()['default'].ensure_connection()
+        connection.close()
+        pooled()['default'].ensure_connection()
+
+    def test_broken_connection_dropped(self, pooled):
+        connection = pooled()['default']
+        connection.ensure_connection()
+        raw = connection.connection
+        raw.close()
+        connection.close()
+        connection.ensure_connection()
+        assert connection.connection is not raw
+        connection.close()
+
+    def test_health_check(self, pooled, monkeypatch):
+        handler = pooled()
+        connection = handler['default']
+        connection.ensure_connection()
+        monkeypatch.setattr(health, 'connections', handler)
+        health.check_connections()
+        assert connection.connection is not None
+        monkeypatch.setattr(type(connection), 'is_usable', lambda self: False)
+        health.check_connections()
+        assert connection.connection is None, (
+            'Проверьте, что неработающее соединение закрывается '
+            'перед запросом'
+        )
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_admin_only(self, user_client, review):
+        response = user_client.get('/api/v1/export/review.csv')
+        assert response.status_code == 403
+
+    def test_review_csv(self, admin_client, review):
+        response = admin_client.get('/api/v1/export/review.csv')
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоком'
+        )
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        assert rows == [{
+            'id': str(review.pk), 'title_id': str(review.title_id),
+            'text': review.text, 'author': str(review.author_id),
+            'score': str(review.score),
+            'pub_date': review.pub_date.isoformat(),
+        }]
+
+    def test_comments_since(self, admin_client, comment, user):
+        old = Comment.objects.create(review=comment.review, author=user,
+                                     text='Старый')
+        Comment.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=10)
+        )
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = admin_client.get('/api/v1/export/comments.ndjson',
+                                    {'since': since})
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in content(response).splitlines()]
+        assert [line['id'] for line in lines] == [comment.pk], (
+            'Проверьте, что ?since= отбирает только новые комментарии'
+        )
+
+    def test_since_without_pub_date(self, admin_client, title):
+        response = admin_client.get('/api/v1/export/titles.csv',
+                                    {'since': '2020-01-01'})
+        assert response.status_code == 400
+
+    def test_unknown_dataset(self, admin_client):
+        assert admin_client.get(
+            '/api/v1/export/passwords.csv').status_code == 404
+
+    def test_command_round_trip(self, tmp_path, comment):
+        call_command('export_data', '--path', str(tmp_path),
+                     '--chunk-size', '1')
+        counts = {
+            model: model.objects.count()
+            for model in (Category, Genre, Title, Review, Comment, User)
+        }
+        for model in (Comment, Review, Title, Genre, Category, User):
+            model.objects.all().delete()
+        call_command('load_data', '--path', str(tmp_path))
+        assert {
+            model: model.objects.count() for model in counts
+        } == counts, (
+            'Проверьте, что load_data загружает выгруженные файлы'
+        )
+        assert Title.objects.get().genre.count() == 2
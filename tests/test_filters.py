@@ -0,0 +1,165 @@
+import re
+
+import pytest
+from api.filters import TitleOrdering
+from django.db import connection
+from django.db.backends.postgresql.base import \
+    DatabaseWrapper as PostgreSQLWrapper
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reviews.models import Category, Review, Title
+
+
+@pytest.fixture
+def catalog(category, genres, user, another_user):
+    book = Category.objects.create(name='Книга', slug='book')
+    drama, comedy = genres
+    titles = {}
+    for name, year, title_category, title_genres, scores in (
+        ('Драма', 1990, category, (drama,), (9, 7)),
+        ('Трагикомедия', 2000, category, (drama, comedy), (4,)),
+        ('Комедия', 2010, book, (comedy,), (10,)),
+        ('Без отзывов', 2020, book, (), ()),
+    ):
+        title = Title.objects.create(name=name, year=year,
+                                     category=title_category)
+        title.genre.set(title_genres)
+        for author, score in zip((user, another_user), scores):
+            Review.objects.create(title=title, author=author, text='Текст',
+                                  score=score)
+        titles[name] = title
+    return titles
+
+
+def names(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    def test_several_genres(self, client, catalog):
+        assert names(client, 'genre=drama,comedy') == [
+            'Драма', 'Комедия', 'Трагикомедия'
+        ], (
+            'Проверьте, что фильтр по нескольким жанрам не дублирует '
+            'произведения с несколькими из них'
+        )
+        assert names(client, 'genre=comedy') == ['Комедия', 'Трагикомедия']
+
+    def test_several_categories(self, client, catalog):
+        assert len(names(client, 'category=movie,book')) == 4
+        assert names(client, 'category=book') == ['Без отзывов', 'Комедия']
+
+    def test_year_range(self, client, catalog):
+        assert names(client, 'year_min=2000&year_max=2010') == [
+            'Комедия', 'Трагикомедия'
+        ], 'Проверьте фильтры year_min и year_max'
+
+    def test_rating_min(self, client, catalog):
+        assert names(client, 'rating_min=8') == ['Драма', 'Комедия'], (
+            'Проверьте, что rating_min отбрасывает произведения с меньшим '
+            'рейтингом и без отзывов'
+        )
+
+    @pytest.mark.parametrize('ordering, expected', (
+        ('year', ['Драма', 'Трагикомедия', 'Комедия', 'Без отзывов']),
+        ('-year', ['Без отзывов', 'Комедия', 'Трагикомедия', 'Драма']),
+        ('-name', ['Трагикомедия', 'Комедия', 'Драма', 'Без отзывов']),
+        ('-rating', ['Комедия', 'Драма', 'Трагикомедия', 'Без отзывов']),
+        ('rating', ['Без отзывов', 'Трагикомедия', 'Драма', 'Комедия']),
+    ))
+    def test_ordering(self, client, catalog, ordering, expected):
+        assert names(client, f'ordering={ordering}') == expected, (
+            f'Проверьте сортировку ?ordering={ordering}'
+        )
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    """The title queries of the filters and orderings are served by
+    indexes. Plans are those of SQLite, the DataBase of the tests,
+    the orders are checked against the indexes of PostgreSQL too."""
+
+    def plan(self, client, query):
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(f'/api/v1/titles/?{query}').status_code == 200
+        sql = next(
+            captured['sql'] for captured in context.captured_queries
+            if captured['sql'].startswith('SELECT "reviews_title"."id"')
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    @pytest.mark.parametrize('query, index', (
+        ('', 'title_name_id_idx'),
+        ('ordering=-year', 'title_year_id_idx'),
+        ('year_min=2000&year_max=2010&ordering=year', 'title_year_id_idx'),
+        ('ordering=-rating', 'title_rating_idx'),
+        ('ordering=rating', 'title_rating_idx'),
+        ('rating_min=8&ordering=-rating', 'title_rating_idx'),
+        ('category=book', 'title_category_name_idx'),
+    ))
+    def test_index_is_used(self, client, catalog, query, index):
+        plan = self.plan(client, query)
+        assert f'INDEX {index}' in plan, (
+            f'Проверьте, что запрос ?{query} использует индекс {index}: '
+            f'{plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что запрос ?{query} сортируется по индексу: {plan}'
+        )
+
+    def test_genre_filter_has_no_join(self, client, catalog):
+        plan = self.plan(client, 'genre=drama,comedy')
+        assert 'CORRELATED' in plan and 'DISTINCT' not in plan, (
+            'Проверьте, что фильтр по жанрам использует подзапрос EXISTS'
+        )
+
+    @pytest.mark.parametrize('ordering, index', (
+        ('name', 'title_name_id_idx'),
+        ('-name', 'title_name_id_idx'),
+        ('-year', 'title_year_id_idx'),
+        ('rating', 'title_rating_idx'),
+        ('-rating', 'title_rating_idx'),
+    ))
+    def test_postgresql_order_matches_index(self, ordering, index):
+        """PostgreSQL scans an index only in the order of its columns or
+        backwards, NULLS FIRST and LAST included: an ascending index has
+        NULLs last, backwards they come first."""
+        postgresql = PostgreSQLWrapper({
+            **connection.settings_dict,
+            'ENGINE': 'django.db.backends.postgresql', 'NAME': 'yamdb',
+        })
+        request = Request(APIRequestFactory().get('/', {
+            'ordering': ordering
+        }))
+        queryset = TitleOrdering().filter_queryset(
+            request, Title.objects.all(), None
+        )
+        sql, params = queryset.query.get_compiler(
+            connection=postgresql
+        ).as_sql()
+        order = (sql % params).split(' ORDER BY ')[1].replace(
+            '"reviews_title".', ''
+        )
+        index_sql = str(next(
+            model_index for model_index in Title._meta.indexes
+            if model_index.name == index
+        ).create_sql(Title, postgresql.schema_editor(collect_sql=True)))
+        terms = re.findall(r'(.+?) (ASC|DESC)(?:, |$)', order)
+        columns = index_sql.split(' ON "reviews_title" ')[1]
+        assert 'NULLS' not in order and ' DESC' not in columns
+        assert len({direction for _, direction in terms}) == 1, (
+            f'Проверьте, что ?ordering={ordering} сортирует все столбцы '
+            f'в одном направлении: {order}'
+        )
+        positions = [columns.find(term) for term, _ in terms]
+        assert -1 not in positions and positions == sorted(positions), (
+            f'Проверьте, что ?ordering={ordering} сортирует по столбцам '
+            f'индекса {index}: {order}, {index_sql}'
+        )
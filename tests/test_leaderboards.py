@@ -0,0 +1,202 @@
+import random
+from contextlib import contextmanager
+
+import pytest
+from django.core.management import CommandError, call_command
+from reviews import leaderboards
+from reviews.models import Genre, LeaderboardEntry, Review, Title
+
+
+@pytest.fixture
+def boards(settings):
+    """Writes in the block are followed by a run of the worker."""
+    settings.LEADERBOARD_SIZE = 2
+    settings.LEADERBOARD_MIN_REVIEWS = 2
+
+    @contextmanager
+    def run():
+        yield
+        call_command('update_leaderboards', '--once', verbosity=0)
+    return run
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'author{number}', email=f'author{number}@yamdb.fake'
+        )
+        for number in range(4)
+    ]
+
+
+def add_title(name, category, genres, year=2000):
+    title = Title.objects.create(name=name, year=year, category=category)
+    title.genre.set(genres)
+    return title
+
+
+def review(title, author, score):
+    return Review.objects.create(title=title, author=author, text='Текст',
+                                 score=score)
+
+
+def top(client, **params):
+    response = client.get('/api/v1/top/', params)
+    assert response.status_code == 200
+    return [entry['title']['name'] for entry in response.json()]
+
+
+@pytest.mark.django_db
+class TestLeaderboards:
+
+    def test_incremental_updates(self, client, boards, authors, category,
+                                 genres):
+        with boards():
+            first = add_title('Первое', category, genres)
+            second = add_title('Второе', category, genres)
+            third = add_title('Третье', category, genres[:1])
+            for title, scores in ((first, (9, 9)), (second, (7, 7)),
+                                  (third, (8,))):
+                for author, score in zip(authors, scores):
+                    review(title, author, score)
+        assert top(client, genre='drama') == ['Первое', 'Второе']
+        assert top(client, category='movie') == ['Первое', 'Второе']
+        assert top(client, year=2000) == ['Первое', 'Второе']
+        with boards():
+            review(third, authors[1], 8)
+        assert top(client, genre='drama') == ['Первое', 'Третье'], (
+            'Проверьте, что произведение с новым отзывом вытесняет последнее'
+        )
+        assert top(client, genre='comedy') == ['Первое', 'Второе']
+        with boards():
+            first.reviews.filter(author=authors[0]).delete()
+        assert top(client, genre='drama') == ['Третье', 'Второе'], (
+            'Проверьте, что произведение без нужного числа отзывов уходит '
+            'и освобождает место'
+        )
+        with boards():
+            third.reviews.get(author=authors[1]).delete()
+            review(third, authors[1], 1)
+        assert top(client, genre='drama') == ['Второе', 'Третье']
+        call_command('rebuild_leaderboards', '--check', verbosity=0)
+
+    def test_title_changes(self, client, boards, authors, category, genres):
+        drama, comedy = genres
+        with boards():
+            titles = [add_title(name, category, [drama])
+                      for name in ('А', 'Б', 'В')]
+            for title, score in zip(titles, (9, 8, 7)):
+                for author in authors[:2]:
+                    review(title, author, score)
+        with boards():
+            titles[0].genre.set([comedy])
+        assert top(client, genre='drama') == ['Б', 'В']
+        assert top(client, genre='comedy') == ['А'], (
+            'Проверьте, что смена жанров переносит произведение'
+        )
+        titles[1].refresh_from_db()
+        with boards():
+            titles[1].year = 1999
+            titles[1].save()
+        assert top(client, year=1999) == ['Б']
+        assert top(client, year=2000) == ['А', 'В']
+        with boards():
+            titles[0].delete()
+        assert top(client, category='movie') == ['Б', 'В'], (
+            'Проверьте, что удаление произведения освобождает место'
+        )
+        with boards():
+            drama.delete()
+        assert not LeaderboardEntry.objects.filter(genre__slug='drama')
+        call_command('rebuild_leaderboards', '--check', verbosity=0)
+
+    def test_random_writes_match_rebuild(self, boards, authors, category,
+                                         genres):
+        randomizer = random.Random(25)
+        with boards():
+            titles = [
+                add_title(f'Произведение {number}', category,
+                          randomizer.sample(genres, randomizer.randint(1, 2)),
+                          year=2000 + number % 2)
+                for number in range(6)
+            ]
+        for _ in range(60):
+            title = randomizer.choice(titles)
+            author = randomizer.choice(authors)
+            existing = title.reviews.filter(author=author).first()
+            with boards():
+                if existing is None:
+                    review(title, author, randomizer.randint(1, 10))
+                elif randomizer.random() < 0.5:
+                    existing.score = randomizer.randint(1, 10)
+                    existing.save()
+                else:
+                    existing.delete()
+            # later writes may hide a wrong board, check every one
+            call_command('rebuild_leaderboards', '--check', verbosity=0)
+
+    def test_repeated_and_concurrent_updates(self, client, boards, authors,
+                                             category, genres):
+        drama = genres[0]
+        with boards():
+            titles = [add_title(name, category, [drama])
+                      for name in ('А', 'Б', 'В')]
+            for title, score in zip(titles, (9, 8, 7)):
+                for author in authors[:2]:
+                    review(title, author, score)
+        board = ('genre_id', drama.pk)
+        for _ in range(2):
+            leaderboards.refill(board)
+            leaderboards.update_leaderboards(titles[1].pk)
+        assert top(client, genre='drama') == ['А', 'Б'], (
+            'Проверьте, что повторное обновление ничего не меняет'
+        )
+        titles[0].delete()
+        assert top(client, genre='drama') == ['Б'], (
+            'Проверьте, что место удалённого произведения не отдаётся'
+        )
+        # another worker has already moved the next title in
+        leaderboards.add_entries(board, [titles[2]])
+        with boards():
+            titles[1].refresh_from_db()
+            titles[1].save()
+        assert top(client, genre='drama') == ['Б', 'В']
+        call_command('rebuild_leaderboards', '--check', verbosity=0)
+
+    def test_rebuild(self, client, authors, category, genres, settings):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        title = add_title('Первое', category, genres)
+        review(title, authors[0], 6)
+        assert top(client, genre='drama') == []
+        with pytest.raises(CommandError):
+            call_command('rebuild_leaderboards', '--check', verbosity=0)
+        call_command('rebuild_leaderboards', verbosity=0)
+        assert top(client, genre='drama') == ['Первое']
+        assert LeaderboardEntry.objects.count() == 4
+
+    def test_single_read(self, client, authors, category, genres, settings,
+                         django_assert_num_queries):
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        for name, score in (('Первое', 5), ('Второе', 9)):
+            review(add_title(name, category, genres), authors[0], score)
+        call_command('rebuild_leaderboards', verbosity=0)
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/top/', {'genre': 'comedy'})
+        assert response.json()[0] == {
+            'title': {'id': Title.objects.get(name='Второе').pk,
+                      'name': 'Второе', 'year': 2000},
+            'rating': 9.0,
+            'reviews_count': 1,
+        }, 'Проверьте, что лучшие произведения читаются одним запросом'
+
+    @pytest.mark.parametrize('params', (
+        {}, {'genre': 'drama', 'year': 2000}, {'year': 'x'}
+    ))
+    def test_bad_requests(self, client, params):
+        assert client.get('/api/v1/top/', params).status_code == 400
+
+    def test_unknown_board(self, client):
+        Genre.objects.create(name='Ужасы', slug='horror')
+        assert top(client, genre='horror') == []
+        assert top(client, genre='missing') == []
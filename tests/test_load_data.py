@@ -0,0 +1,62 @@
+import io
+import os
+from csv import DictReader
+
+import pytest
+from django.core.management import call_command
+from django.utils.dateparse import parse_datetime
+from reviews.models import Comment, Genre, Review, Title, User
+
+
+def read_lines(name):
+    from reviews.management.commands.load_data import DATA_DIR
+    with open(os.path.join(DATA_DIR, name), encoding='utf8') as file:
+        return file.read()
+
+
+@pytest.mark.django_db
+class TestLoadData:
+
+    def test_load_bundled_data(self):
+        call_command('load_data', '--batch-size', '7')
+        assert Genre.objects.count() == 15
+        assert Title.objects.count() == 32
+        assert Review.objects.exists() and Comment.objects.exists()
+        title = Title.objects.get(pk=1)
+        assert title.reviews_count == title.reviews.count(), (
+            'Проверьте, что после импорта рейтинги пересчитаны'
+        )
+
+    def test_keeps_pub_date(self):
+        call_command('load_data')
+        row = next(DictReader(io.StringIO(read_lines('review.csv'))))
+        assert Review.objects.get(pk=row['id']).pub_date == parse_datetime(
+            row['pub_date']
+        ), 'Проверьте, что импорт сохраняет pub_date из csv'
+
+    def test_dry_run_writes_nothing(self):
+        call_command('load_data', '--dry-run')
+        assert not User.objects.exists()
+
+    def test_rejected_rows(self, tmp_path, capsys):
+        for name in ('category.csv', 'genre.csv', 'genre_title.csv',
+                     'users.csv', 'comments.csv'):
+            (tmp_path / name).write_text(
+                read_lines(name).splitlines()[0] + '\n', encoding='utf8'
+            )
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n'
+            '1,Good,1994,\n'
+            '2,Future,3000,\n'
+            '3,Orphan,2000,42\n',
+            encoding='utf8'
+        )
+        (tmp_path / 'review.csv').write_text(
+            'id,title_id,text,author,score,pub_date\n', encoding='utf8'
+        )
+        call_command('load_data', '--path', str(tmp_path))
+        assert list(Title.objects.values_list('pk', flat=True)) == [1]
+        errors = capsys.readouterr().err
+        assert 'titles.csv, row 2' in errors and 'titles.csv, row 3' in errors, (
+            'Проверьте, что отклонённые строки попадают в отчёт'
+        )
@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_server_timing(self, client, title):
+        response = client.get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        assert 'db;dur=' in timing and '7 queries' in timing, (
+            'Проверьте, что заголовок Server-Timing содержит время БД'
+        )
+        assert 'serialize;dur=' in timing and 'total;dur=' in timing
+
+    def test_metrics_endpoint(self, client, user_client, admin_client,
+                              title):
+        client.get(f'/api/v1/titles/{title.pk}/')
+        assert client.get('/api/v1/_metrics').status_code == 401
+        assert user_client.get('/api/v1/_metrics').status_code == 403
+        response = admin_client.get('/api/v1/_metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert ('api_request_duration_seconds_count'
+                '{view="title-detail",method="retrieve"}') in text, (
+            'Проверьте, что гистограммы ведутся по эндпоинтам'
+        )
+        assert 'api_request_db_queries_total' in text
@@ -0,0 +1,57 @@
+import pytest
+from reviews.models import Review
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    return [
+        Review.objects.create(
+            title=title, text='text', score=5,
+            author=django_user_model.objects.create_user(
+                username=f'author{index}', email=f'author{index}@yamdb.fake')
+        )
+        for index in range(15)
+    ]
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_page_number_by_default(self, client, reviews, title):
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/')
+        assert response.json()['count'] == 15, (
+            'Проверьте, что по умолчанию используется постраничная пагинация'
+        )
+
+    def test_cursor_pages(self, client, reviews, title,
+                          django_assert_num_queries):
+        url = f'/api/v1/titles/{title.pk}/reviews/?pagination=cursor'
+        # stamps, title and one page of reviews, no COUNT(*)
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        first = response.json()
+        assert 'count' not in first
+        assert first['previous'] is None
+        second = client.get(first['next']).json()
+        assert second['next'] is None
+        ids = [item['id'] for item in first['results'] + second['results']]
+        expected = list(
+            Review.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация проходит все отзывы по порядку'
+        )
+
+    def test_titles_cursor(self, client, title):
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == 200
+        assert response.json()['results'][0]['id'] == title.pk
+
+    @pytest.mark.parametrize('query', ('ordering=-year', 'search=text'))
+    def test_titles_cursor_keeps_its_order(self, client, title, query):
+        response = client.get(f'/api/v1/titles/?pagination=cursor&{query}')
+        assert response.status_code == 400, (
+            'Проверьте, что курсорная пагинация произведений отклоняет '
+            'параметры, меняющие порядок'
+        )
@@ -0,0 +1,193 @@
+import pytest
+from django.core.management import call_command
+from reviews.models import Comment, LeaderboardEntry, Review, Title
+
+
+@pytest.fixture
+def many_titles(category, genres, django_user_model):
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{index}', email=f'author{index}@yamdb.fake')
+        for index in range(10)
+    ]
+    titles = []
+    for index in range(10):
+        title = Title.objects.create(name=f'Title {index}', year=2000,
+                                     category=category)
+        title.genre.set(genres)
+        titles.append(title)
+    review = None
+    for author in authors:
+        review = Review.objects.create(title=titles[0], author=author,
+                                       text='text', score=5)
+        Comment.objects.create(review=review, author=author, text='text')
+    for author in authors:
+        Comment.objects.create(review=review, author=author, text='more')
+    return titles
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+    """Every list endpoint costs a fixed number of queries
+    no matter how many objects are on the page."""
+
+    def test_titles_list(self, client, many_titles,
+                         django_assert_num_queries):
+        # stamps of titles, genres, categories and tombstones, count,
+        # titles with categories, genres
+        with django_assert_num_queries(7):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == 10
+
+    def test_title_detail(self, client, many_titles,
+                          django_assert_num_queries):
+        # stamps, title with category, genres
+        with django_assert_num_queries(3):
+            client.get(f'/api/v1/titles/{many_titles[0].pk}/')
+
+    def test_reviews_list(self, client, many_titles,
+                          django_assert_num_queries):
+        # stamps, title, count, reviews with authors
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/{many_titles[0].pk}/reviews/')
+        assert len(response.json()['results']) == 10
+
+    def test_comments_list(self, client, many_titles,
+                           django_assert_num_queries):
+        review = Review.objects.filter(comments__text='more').first()
+        # stamps, review, count, comments with authors
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/{many_titles[0].pk}/reviews/{review.pk}'
+                '/comments/')
+        assert len(response.json()['results']) == 10
+
+    def test_users_list(self, admin_client, many_titles,
+                        django_assert_num_queries):
+        # authenticated user, count, users
+        with django_assert_num_queries(3):
+            response = admin_client.get('/api/v1/users/')
+        assert len(response.json()['results']) == 10
+
+
+@pytest.mark.django_db
+class TestCreateQueries:
+    """Creating a review or a comment loads its parent once."""
+
+    def test_review_create(self, user_client, title,
+                           django_assert_num_queries):
+        # user, title, insert and rating update inside a savepoint
+        with django_assert_num_queries(6):
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Текст', 'score': 7}
+            )
+        assert response.status_code == 201
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_create_committed(self, user_client, title, settings,
+                                     django_assert_num_queries):
+        """Nothing runs after the commit, the boards of the title are
+        updated by the update_leaderboards worker."""
+        settings.LEADERBOARD_MIN_REVIEWS = 1
+        # user, title, and insert and rating update in one transaction
+        with django_assert_num_queries(5):
+            response = user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                {'text': 'Текст', 'score': 7}
+            )
+        assert response.status_code == 201
+        assert not LeaderboardEntry.objects.exists()
+        call_command('update_leaderboards', '--once', verbosity=0)
+        assert LeaderboardEntry.objects.filter(title=title).count() == 4
+
+    def test_duplicate_review(self, user_client, review):
+        response = user_client.post(
+            f'/api/v1/titles/{review.title_id}/reviews/',
+            {'text': 'Ещё один', 'score': 1}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что второй отзыв на произведение '
+            'возвращает статус 400'
+        )
+        assert 'non_field_errors' in response.json()
+        assert Review.objects.count() == 1
+
+    def test_comment_create(self, user_client, review,
+                            django_assert_num_queries):
+        # user, review, insert
+        with django_assert_num_queries(3):
+            response = user_client.post(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.pk}'
+                '/comments/',
+                {'text': 'Комментарий'}
+            )
+        assert response.status_code == 201
+
+    def test_comment_of_another_title(self, user_client, review, category):
+        other = Title.objects.create(name='Другое', year=2000,
+                                     category=category)
+        response = user_client.get(
+            f'/api/v1/titles/{other.pk}/reviews/{review.pk}/comments/'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв другого произведения '
+            'возвращает статус 404'
+        )
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    """?fields= trims the response and the SQL behind it."""
+
+    def test_titles_list(self, client, many_titles,
+                         django_assert_num_queries):
+        # four stamps, count, titles without categories, no genres
+        with django_assert_num_queries(6) as context:
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+        assert list(response.json()['results'][0]) == [
+            'id', 'name', 'rating'
+        ], 'Проверьте, что ?fields= оставляет только указанные поля'
+        assert response.json()['results'][0]['rating'] == 5
+        sql = context.captured_queries[-1]['sql']
+        assert 'description' not in sql and 'reviews_category' not in sql, (
+            'Проверьте, что ?fields= не загружает из БД лишние столбцы'
+        )
+
+    def test_title_relations(self, client, many_titles,
+                             django_assert_num_queries):
+        # stamps, title with category, genres, mean rating of the stats
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/{many_titles[0].pk}/'
+                '?fields=name,genre,category,stats&expand=stats'
+            )
+        data = response.json()
+        assert list(data) == ['name', 'genre', 'category', 'stats']
+        assert data['stats']['histogram']['5'] == 10
+
+    def test_reviews_list(self, client, many_titles,
+                          django_assert_num_queries):
+        # stamps, title, count, reviews without authors and texts
+        with django_assert_num_queries(4) as context:
+            response = client.get(
+                f'/api/v1/titles/{many_titles[0].pk}/reviews/?fields=id,score'
+            )
+        assert list(response.json()['results'][0]) == ['id', 'score']
+        sql = context.captured_queries[-1]['sql']
+        assert '"text"' not in sql and 'reviews_user' not in sql, (
+            'Проверьте, что ?fields= не загружает текст и автора отзыва'
+        )
+
+    def test_comments_cursor_page(self, client, many_titles,
+                                  django_assert_num_queries):
+        review = Review.objects.filter(comments__text='more').first()
+        # stamps, review, comments, the next cursor needs no more
+        with django_assert_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{many_titles[0].pk}/reviews/{review.pk}'
+                '/comments/?fields=author&pagination=cursor'
+            )
+        assert response.json()['results'][0] == {'author': 'author9'}
+        assert response.json()['next'] is not None
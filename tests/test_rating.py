@@ -0,0 +1,132 @@
+import pytest
+from django.core.management import CommandError, call_command
+from api import ratings
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_review_writes(self, title, user, another_user):
+        first = Review.objects.create(title=title, author=user, text='a',
+                                      score=4)
+        Review.objects.create(title=title, author=another_user, text='b',
+                              score=9)
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (2, 13), (
+            'Проверьте, что создание отзыва обновляет агрегаты рейтинга'
+        )
+
+        first.score = 10
+        first.save()
+        title.refresh_from_db()
+        assert title.score_sum == 19, (
+            'Проверьте, что изменение оценки обновляет сумму оценок'
+        )
+        assert (title.score_4, title.score_9, title.score_10) == (0, 1, 1), (
+            'Проверьте, что изменение оценки переносит отзыв в гистограмме'
+        )
+
+        first.delete()
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (1, 9), (
+            'Проверьте, что удаление отзыва обновляет агрегаты рейтинга'
+        )
+        assert title.rating == 9
+        assert title.histogram == [0] * 8 + [1, 0]
+
+    def test_title_list_uses_stored_rating(self, client, review):
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['results'][0]['rating'] == 8, (
+            'Проверьте, что рейтинг берётся из сохранённых агрегатов'
+        )
+
+    def test_rebuild_ratings(self, title, review):
+        Title.objects.filter(pk=title.pk).update(reviews_count=5,
+                                                 score_sum=1, score_3=2)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum) == (1, 8)
+        assert title.histogram == [0] * 7 + [1, 0, 0], (
+            'Проверьте, что rebuild_ratings пересчитывает гистограмму оценок'
+        )
+        call_command('rebuild_ratings', '--check')
+
+
+def test_median_score():
+    assert ratings.median_score([0] * 10) is None
+    assert ratings.median_score([1, 0, 0, 0, 0, 0, 0, 0, 0, 2]) == 10
+    assert ratings.median_score([1, 0, 0, 0, 0, 0, 0, 0, 0, 1]) == 5.5
+    assert ratings.median_score([0, 1, 1, 1, 0, 0, 0, 0, 0, 0]) == 3
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    @pytest.fixture
+    def reviewed(self, title, user, another_user, settings):
+        settings.RATING_PRIOR_WEIGHT = 2
+        Review.objects.create(title=title, author=user, text='a', score=10)
+        Review.objects.create(title=title, author=another_user, text='b',
+                              score=6)
+        title.refresh_from_db()
+        return title
+
+    def test_stats_endpoint(self, client, reviewed):
+        response = client.get(f'/api/v1/titles/{reviewed.pk}/stats/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['histogram'] == {
+            str(score): int(score in (6, 10)) for score in range(1, 11)
+        }, 'Проверьте, что гистограмма оценок отдаётся по /stats/'
+        assert (data['reviews_count'], data['rating'], data['median']) == (
+            2, 8, 8
+        )
+        # the only title is the whole prior: (16 + 2 * 8) / (2 + 2)
+        assert data['weighted_rating'] == 8
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    def test_stats_embedded_on_request(self, client, reviewed):
+        titles = client.get('/api/v1/titles/').json()['results']
+        assert 'stats' not in titles[0], (
+            'Проверьте, что статистика не добавляется в список по умолчанию'
+        )
+        titles = client.get('/api/v1/titles/?expand=stats').json()[
+            'results'
+        ]
+        assert titles[0]['stats']['median'] == 8, (
+            'Проверьте, что ?expand=stats добавляет статистику произведения'
+        )
+
+    def test_ordering_by_weighted_rating(self, client, title, category,
+                                         user, another_user, admin,
+                                         settings):
+        settings.RATING_PRIOR_WEIGHT = 2
+        one_review, low = (
+            Title.objects.create(name=name, year=2000, category=category)
+            for name in ('Один отзыв', 'Низкая оценка')
+        )
+        Title.objects.create(name='Без отзывов', year=2000,
+                             category=category)
+        for review_title, author, score in (
+            (title, user, 10), (title, another_user, 10),
+            (one_review, user, 10), (low, admin, 2),
+        ):
+            Review.objects.create(title=review_title, author=author,
+                                  text='Текст', score=score)
+
+        def names(ordering):
+            return [title['name'] for title in client.get(
+                f'/api/v1/titles/?ordering={ordering}'
+            ).json()['results']]
+
+        # mean 8: (20 + 16) / 4 = 9 beats (10 + 16) / 3 for a single ten
+        assert names('-weighted_rating') == [
+            'Побег из Шоушенка', 'Один отзыв', 'Низкая оценка', 'Без отзывов'
+        ], 'Проверьте сортировку по взвешенному рейтингу'
+        assert names('weighted_rating') == [
+            'Низкая оценка', 'Один отзыв', 'Побег из Шоушенка', 'Без отзывов'
+        ], 'Проверьте, что произведения без отзывов всегда в конце списка'
@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from api import renderers
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+DATA = ReturnDict((
+    ('id', 1),
+    ('text', 'Текст'),
+    ('pub_date', datetime(2022, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)),
+    ('rating', Decimal('7.5')),
+    ('errors', [ErrorDetail('Обязательное поле.', code='required')]),
+    ('label', gettext_lazy('Оценка')),
+    ('histogram', {1: 0, '2': 1}),
+    ('next', None),
+), serializer=None)
+
+
+@pytest.fixture(params=('orjson', 'json'))
+def backend(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(renderers, 'orjson', None)
+    return request.param
+
+
+def test_renders_like_drf(backend):
+    rendered = renderers.FastJSONRenderer().render(DATA, 'application/json')
+    assert rendered == JSONRenderer().render(DATA, 'application/json'), (
+        'Проверьте, что FastJSONRenderer выводит то же, что JSONRenderer'
+    )
+    assert json.loads(rendered)['pub_date'] == '2022-01-02T03:04:05.678901Z'
+
+
+def test_indent_falls_back():
+    rendered = renderers.FastJSONRenderer().render(
+        {'id': 1}, 'application/json; indent=2'
+    )
+    assert rendered == b'{\n  "id": 1\n}'
+
+
+def test_nan_is_null():
+    pytest.importorskip('orjson')
+    rendered = renderers.FastJSONRenderer().render(
+        {'rating': float('nan')}, 'application/json'
+    )
+    assert rendered == b'{"rating":null}', (
+        'Проверьте, что orjson выводит NaN как null, как описано в README'
+    )
+
+
+@pytest.mark.django_db
+class TestResponses:
+
+    def test_pages_and_errors(self, client, user_client, review):
+        response = client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+        assert response['Content-Type'] == 'application/json'
+        assert response.json()['results'][0]['text'] == 'Текст'
+        response = user_client.post(
+            f'/api/v1/titles/{review.title_id}/reviews/', '{"score": 11',
+            content_type='application/json'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что неверный JSON возвращает статус 400'
+        )
+        assert 'JSON parse error' in response.json()['detail']
+        assert client.get('/api/v1/titles/0/').json() == {
+            'detail': 'Not found.'
+        }
@@ -0,0 +1,55 @@
+import pytest
+from reviews.models import Review, Title
+
+
+@pytest.fixture
+def catalog(category, user, another_user):
+    titles = [
+        Title.objects.create(name='Крестный отец', year=1972,
+                             category=category,
+                             description='Сага о семье Корлеоне'),
+        Title.objects.create(name='Крестный отец 2', year=1974,
+                             category=category),
+        Title.objects.create(name='Отец солдата', year=1964,
+                             category=category),
+    ]
+    Review.objects.create(title=titles[0], author=user, score=10,
+                          text='Лучшая гангстерская сага')
+    Review.objects.create(title=titles[1], author=another_user, score=9,
+                          text='Продолжение не хуже')
+    return titles
+
+
+@pytest.mark.django_db
+class TestFullTextSearch:
+
+    def test_title_search(self, client, catalog):
+        response = client.get('/api/v1/titles/?search=крест')
+        names = [item['name'] for item in response.json()['results']]
+        assert sorted(names) == ['Крестный отец', 'Крестный отец 2'], (
+            'Проверьте, что поиск находит произведения по началу слова'
+        )
+        response = client.get('/api/v1/titles/?search=корлеоне')
+        assert [item['name'] for item in response.json()['results']] == [
+            'Крестный отец'
+        ], 'Проверьте, что поиск идёт и по описанию'
+
+    def test_index_follows_updates(self, client, catalog,
+                                   django_capture_on_commit_callbacks):
+        title = catalog[2]
+        title.name = 'Балтийское небо'
+        with django_capture_on_commit_callbacks(execute=True):
+            title.save()
+        response = client.get('/api/v1/titles/?search=небо')
+        assert response.json()['count'] == 1
+        with django_capture_on_commit_callbacks(execute=True):
+            title.delete()
+        response = client.get('/api/v1/titles/?search=небо')
+        assert response.json()['count'] == 0
+
+    def test_review_search(self, client, catalog):
+        response = client.get('/api/v1/reviews/search/?search=сага')
+        results = response.json()['results']
+        assert [item['title'] for item in results] == [catalog[0].pk]
+        response = client.get('/api/v1/reviews/search/')
+        assert response.json()['count'] == 0
@@ -0,0 +1,49 @@
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from reviews.models import OutgoingEmail
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_queues_email(self, client):
+        response = client.post('/api/v1/auth/signup/', {
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо сама'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'newbie@yamdb.fake'
+
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == 1
+        assert 'confirmation code' in mail.outbox[0].body
+        email.refresh_from_db()
+        assert email.sent is not None
+
+    def test_failed_email_is_retried_later(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_send_emails.FailingBackend'
+        email = OutgoingEmail.objects.create(
+            subject='s', message='m', recipient='a@yamdb.fake'
+        )
+        call_command('send_emails', '--once')
+        email.refresh_from_db()
+        assert email.sent is None and email.attempts == 1
+        assert email.next_attempt > email.created, (
+            'Проверьте, что неудачная отправка откладывается'
+        )
+
+
+class FailingBackend:
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def open(self):
+        raise ConnectionError('mail server is down')
+
+    def close(self):
+        pass
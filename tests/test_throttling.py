@@ -0,0 +1,124 @@
+import pytest
+from api import throttling
+from api.cache import get_cache
+from reviews.models import Title
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(store='cache', **rates):
+        settings.THROTTLE_STORE = store
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates
+        }
+    yield set_rates
+    throttling.STORES['local'].clear()
+
+
+def sign_up(client, number, address='127.0.0.1', forwarded=None, **data):
+    headers = {} if forwarded is None else {'HTTP_X_FORWARDED_FOR': forwarded}
+    return client.post('/api/v1/auth/signup/', {
+        'username': f'user{number}',
+        'email': f'user{number}@yamdb.fake',
+        **data
+    }, REMOTE_ADDR=address, **headers)
+
+
+def test_take_token():
+    bucket, wait = throttling.take_token(None, 2, 60, 1000)
+    bucket, wait = throttling.take_token(bucket, 2, 60, 1000)
+    assert wait == 0
+    bucket, wait = throttling.take_token(bucket, 2, 60, 1000)
+    assert wait == 30, (
+        'Проверьте, что пустое ведро сообщает время до следующего токена'
+    )
+    assert throttling.take_token(bucket, 2, 60, 1030)[1] == 0
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    @pytest.mark.parametrize('store', ('cache', 'local'))
+    def test_signup_per_address(self, client, rates, store):
+        rates(store, signup='2/min')
+        assert sign_up(client, 1).status_code == 200
+        assert sign_up(client, 2).status_code == 200
+        response = sign_up(client, 3)
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничена по IP адресу'
+        )
+        assert response['Retry-After'] == '30', (
+            'Проверьте, что ответ 429 содержит заголовок Retry-After'
+        )
+        assert sign_up(client, 3, address='10.0.0.1').status_code == 200
+
+    def test_buckets_outlive_culling(self, client, rates):
+        rates(signup='1/min')
+        assert sign_up(client, 1).status_code == 200
+        for number in range(1000):
+            get_cache().set(f'api:filler:{number}', number)
+        assert sign_up(client, 2).status_code == 429, (
+            'Проверьте, что ответы API в кеше не вытесняют счётчики запросов'
+        )
+
+    def test_address_behind_proxy(self, client, rates):
+        rates(signup='1/min')
+        proxy = '172.18.0.5'
+        assert sign_up(client, 1, address=proxy,
+                       forwarded='10.0.0.1').status_code == 200
+        assert sign_up(client, 2, address=proxy,
+                       forwarded='10.0.0.2').status_code == 200, (
+            'Проверьте, что клиенты за прокси ограничиваются по своему адресу'
+        )
+        assert sign_up(
+            client, 3, address=proxy,
+            forwarded='1.2.3.4, 10.0.0.1'
+        ).status_code == 429, (
+            'Проверьте, что подделанный X-Forwarded-For не обходит ограничение'
+        )
+
+    def test_signup_per_identity(self, client, rates):
+        rates(signup_identity='1/hour')
+        assert sign_up(client, 1).status_code == 200
+        assert sign_up(client, 1, address='10.0.0.1').status_code == 429, (
+            'Проверьте, что регистрация ограничена по имени пользователя '
+            'с любого адреса'
+        )
+        assert sign_up(
+            client, 2, address='10.0.0.2', email='USER1@yamdb.fake'
+        ).status_code == 429, 'Проверьте ограничение по email'
+
+    def test_token_per_username(self, client, rates, user):
+        rates(token_identity='2/min')
+        for _ in range(2):
+            assert client.post('/api/v1/auth/token/', {
+                'username': user.username, 'confirmation_code': 'wrong'
+            }).status_code == 400
+        assert client.post('/api/v1/auth/token/', {
+            'username': user.username, 'confirmation_code': 'wrong'
+        }, REMOTE_ADDR='10.0.0.1').status_code == 429, (
+            'Проверьте, что подбор кода подтверждения ограничен'
+        )
+
+    def test_review_create_per_user(self, user_client, another_user_client,
+                                    rates, title, category):
+        rates(review_create='1/hour')
+        other = Title.objects.create(name='Другое', year=2000,
+                                     category=category)
+        review = {'text': 'Текст', 'score': 5}
+        assert user_client.post(f'/api/v1/titles/{title.pk}/reviews/',
+                                review).status_code == 201
+        assert user_client.post(f'/api/v1/titles/{other.pk}/reviews/',
+                                review).status_code == 429, (
+            'Проверьте, что создание отзывов ограничено для пользователя'
+        )
+        assert user_client.get(
+            f'/api/v1/titles/{title.pk}/reviews/'
+        ).status_code == 200
+        assert another_user_client.post(f'/api/v1/titles/{other.pk}/reviews/',
+                                        review).status_code == 201
+
+    def test_scope_without_rate(self, client, rates):
+        rates()
+        for number in range(10):
+            assert sign_up(client, number).status_code == 200
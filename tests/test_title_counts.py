@@ -0,0 +1,101 @@
+import pytest
+from django.core.management import CommandError, call_command
+from reviews.models import Category, Genre, Title
+
+
+def counts(*objects):
+    return [
+        type(obj).objects.get(pk=obj.pk).titles_count for obj in objects
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleCounts:
+
+    def test_category_follows_titles(self, title, category):
+        other = Category.objects.create(name='Книга', slug='book')
+        assert counts(category, other) == [1, 0], (
+            'Проверьте, что создание произведения увеличивает счётчик '
+            'категории'
+        )
+        title.category = other
+        title.save()
+        assert counts(category, other) == [0, 1], (
+            'Проверьте, что смена категории переносит произведение'
+        )
+        title.name = 'Новое название'
+        title.save()
+        assert counts(category, other) == [0, 1]
+        title.delete()
+        assert counts(category, other) == [0, 0]
+
+    def test_genres_follow_titles(self, title, genres):
+        drama, comedy = genres
+        assert counts(drama, comedy) == [1, 1]
+        title.genre.remove(drama, drama)
+        title.genre.remove(drama)
+        assert counts(drama, comedy) == [0, 1], (
+            'Проверьте, что удаление жанра учитывается один раз'
+        )
+        drama.titles.add(title)
+        title.genre.add(drama)
+        assert counts(drama, comedy) == [1, 1], (
+            'Проверьте, что добавление со стороны жанра учитывается'
+        )
+        comedy.titles.clear()
+        assert counts(drama, comedy) == [1, 0]
+        title.genre.set([comedy])
+        assert counts(drama, comedy) == [0, 1]
+        title.delete()
+        assert counts(drama, comedy) == [0, 0], (
+            'Проверьте, что удаление произведения уменьшает счётчики жанров'
+        )
+
+    def test_bulk_upsert(self, admin_client, title, category, genres):
+        drama, comedy = genres
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'id': title.pk, 'name': title.name, 'year': 1994,
+             'genre': ['comedy'], 'category': 'movie'},
+            {'name': 'Новое', 'year': 2000, 'genre': ['comedy'],
+             'category': 'movie'},
+        ], format='json')
+        assert response.status_code == 200
+        assert counts(drama, comedy, category) == [0, 2, 2], (
+            'Проверьте, что пакетная загрузка обновляет счётчики'
+        )
+
+    def test_rebuild_title_counts(self, title, category, genres):
+        Genre.objects.update(titles_count=7)
+        with pytest.raises(CommandError):
+            call_command('rebuild_title_counts', '--check')
+        call_command('rebuild_title_counts')
+        assert counts(category, *genres) == [1, 1, 1]
+        call_command('rebuild_title_counts', '--check')
+
+    def test_counted_listing(self, client, title, category,
+                             django_assert_num_queries,
+                             django_capture_on_commit_callbacks):
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/genres/?expand=titles_count')
+        assert response.json()['results'][0] == {
+            'name': 'Драма', 'slug': 'drama', 'titles_count': 1
+        }, 'Проверьте, что ?expand=titles_count добавляет число произведений'
+        assert 'titles_count' not in client.get(
+            '/api/v1/categories/'
+        ).json()['results'][0]
+        assert client.get(
+            '/api/v1/categories/?expand=titles_count'
+        ).json()['results'][0]['titles_count'] == 1
+        title_genres = client.get(
+            '/api/v1/titles/?expand=titles_count'
+        ).json()['results'][0]['genre']
+        assert 'titles_count' not in title_genres[0]
+        with django_capture_on_commit_callbacks(execute=True):
+            Title.objects.create(name='Другое', year=2000,
+                                 category=category)
+        assert client.get(
+            '/api/v1/categories/?expand=titles_count'
+        ).json()['results'][0]['titles_count'] == 2, (
+            'Проверьте, что кеш категорий сбрасывается при записи '
+            'произведений'
+        )